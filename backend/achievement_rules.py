@@ -0,0 +1,69 @@
+# Achievement rules, evaluated without touching the database
+from pydantic import BaseModel
+from typing import Dict, List, Tuple
+from models import Achievement, CourseSummary
+
+class AchievementRule(BaseModel):
+    type: str
+    # Progress counter the rule watches; "course" compares a course's
+    # completed lessons with its lesson count instead of a threshold
+    counter: str
+    threshold: int = 1
+    title: str
+    description: str
+    icon: str
+    points: int
+
+ACHIEVEMENT_RULES: List[AchievementRule] = [
+    AchievementRule(type="first_lesson", counter="completed", threshold=1,
+                    title="Первые шаги", description="Завершил первый урок", icon="🎯", points=10),
+    AchievementRule(type="first_code", counter="codingCompleted", threshold=1,
+                    title="Программист", description="Написал первую программу", icon="💻", points=25),
+    AchievementRule(type="five_lessons", counter="completed", threshold=5,
+                    title="Настойчивость", description="Завершил 5 уроков", icon="🔥", points=50),
+    AchievementRule(type="ten_lessons", counter="completed", threshold=10,
+                    title="Исследователь", description="Завершил 10 уроков", icon="🔍", points=100),
+    AchievementRule(type="course_{courseId}", counter="course",
+                    title="Мастер курса", description="Завершил курс '{courseTitle}'", icon="🏆", points=200),
+]
+
+def _reached(threshold: int, before: int, after: int) -> bool:
+    return before < threshold <= after
+
+def evaluate_achievements(
+    user_id: str,
+    counters: Dict[str, Tuple[int, int]],
+    courses: List[Tuple[CourseSummary, int, int, int]]
+) -> List[Achievement]:
+    """Return the achievements whose rule was reached between two states.
+
+    counters maps a counter name to its (before, after) values; courses
+    holds (course, completed before, completed after, lesson count) for
+    the courses that changed. A progress event passes the values around
+    its own write, so the cost does not depend on the user's history; a
+    full re-check passes zero as every "before". Awarding is idempotent,
+    so a rule that fires again for an awarded achievement is harmless.
+    """
+    earned = []
+    for rule in ACHIEVEMENT_RULES:
+        if rule.counter == "course":
+            for course, before, after, lesson_count in courses:
+                if lesson_count and _reached(lesson_count, before, after):
+                    earned.append(Achievement(
+                        userId=user_id,
+                        type=rule.type.format(courseId=course.id),
+                        title=rule.title,
+                        description=rule.description.format(courseTitle=course.title),
+                        icon=rule.icon,
+                        points=rule.points
+                    ))
+        elif rule.counter in counters and _reached(rule.threshold, *counters[rule.counter]):
+            earned.append(Achievement(
+                userId=user_id,
+                type=rule.type,
+                title=rule.title,
+                description=rule.description,
+                icon=rule.icon,
+                points=rule.points
+            ))
+    return earned
@@ -1,19 +1,22 @@
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from models import User, UserRole
+from models import User, UserRole, TokenData
+from user_cache import user_cache
+from token_versions import token_versions
+from password_hasher import pwd_context, password_hasher
 import os
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+# Opt-in: embed user id, role and token version into access tokens
+JWT_CLAIMS_MODE = os.getenv("JWT_CLAIMS_MODE", "false").lower() in ("1", "true", "yes")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 class AuthService:
@@ -26,6 +29,13 @@ class AuthService:
     def get_password_hash(self, password: str) -> str:
         return pwd_context.hash(password)
     
+    # Async variants run bcrypt in the hashing pool instead of on the event loop
+    async def check_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await password_hasher.verify(plain_password, hashed_password)
+    
+    async def hash_password(self, password: str) -> str:
+        return await password_hasher.hash(password)
+    
     async def get_user_by_email(self, email: str) -> Optional[User]:
         user_data = await self.db.users.find_one({"email": email})
         if user_data:
@@ -36,7 +46,7 @@ class AuthService:
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not self.verify_password(password, user.password):
+        if not await self.check_password(password, user.password):
             return None
         return user
     
@@ -50,17 +60,64 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return encoded_jwt
     
-    async def verify_token(self, token: str) -> Optional[User]:
+    async def create_user_token(self, user: User, expires_delta: Optional[timedelta] = None) -> str:
+        data = {"sub": user.email}
+        if JWT_CLAIMS_MODE:
+            data.update({
+                "uid": user.id,
+                "role": user.role.value,
+                "ver": await token_versions.get(self.db, user.id)
+            })
+        return self.create_access_token(data, expires_delta)
+    
+    async def revoke_user_tokens(self, user_id: str) -> int:
+        return await token_versions.bump(self.db, user_id)
+    
+    async def decode_token(self, token: str) -> Optional[dict]:
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            email: str = payload.get("sub")
-            if email is None:
-                return None
         except jwt.PyJWTError:
             return None
+        if payload.get("sub") is None:
+            return None
         
-        user = await self.get_user_by_email(email)
+        # Claims-mode tokens are revoked by bumping the user's token version
+        if "ver" in payload and payload["ver"] != await token_versions.get(self.db, payload.get("uid")):
+            return None
+        return payload
+    
+    async def get_user_by_subject(self, email: str) -> Optional[User]:
+        user = user_cache.get(email)
+        if user is None:
+            user = await self.get_user_by_email(email)
+            if user:
+                user_cache.set(email, user)
         return user
+    
+    async def verify_token(self, token: str) -> Optional[User]:
+        payload = await self.decode_token(token)
+        if payload is None:
+            return None
+        return await self.get_user_by_subject(payload["sub"])
+    
+    async def get_token_claims(self, token: str) -> Optional[TokenData]:
+        payload = await self.decode_token(token)
+        if payload is None:
+            return None
+        
+        if "uid" in payload and "role" in payload:
+            return TokenData(
+                email=payload["sub"],
+                userId=payload["uid"],
+                role=payload["role"],
+                version=payload.get("ver")
+            )
+        
+        # Legacy token carrying only the email - fall back to the user document
+        user = await self.get_user_by_subject(payload["sub"])
+        if user is None:
+            return None
+        return TokenData(email=user.email, userId=user.id, role=user.role)
 
 # Dependency to get current user
 async def get_current_user(
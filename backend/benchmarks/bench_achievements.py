@@ -0,0 +1,79 @@
+# Benchmark: achievement checks, full re-scan vs per-event rules
+#
+# The old check reloaded the user's progress and achievements and walked
+# every course's lessons after each completion. Rules now run on the
+# counters around each progress write, so checking costs the same however
+# much history the user has.
+#
+# Usage: python benchmarks/bench_achievements.py [--history 100 1000 5000] [--courses 20] [--repeat 10]
+import argparse
+import asyncio
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+from progress_rollups import rebuild_rollups
+
+async def seed(db, courses: int, lessons: int, history: int) -> User:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    student = User(email="bench@student.io", password="x", name="Bench", role=UserRole.STUDENT)
+    await db.users.insert_one(student.dict())
+    lesson_docs, progress_docs = [], []
+    for c in range(courses):
+        course = Course(title=f"Курс {c}", description="bench", order=c, createdBy="bench")
+        for l in range(lessons):
+            lesson = Lesson(title=f"Урок {l}", description="bench", content="x", type=LessonType.CODING,
+                            duration=10, order=l, courseId=course.id)
+            course.lessons.append(lesson.id)
+            lesson_docs.append(lesson.dict())
+            if len(progress_docs) < history:
+                progress_docs.append(Progress(userId=student.id, lessonId=lesson.id, courseId=course.id,
+                                              status=ProgressStatus.COMPLETED).dict())
+        await db.courses.insert_one(course.dict())
+    await db.lessons.insert_many(lesson_docs)
+    await db.progress.insert_many(progress_docs)
+    await rebuild_rollups(db)
+    return student
+
+async def legacy_check(db_service: DatabaseService, user_id: str):
+    # The original check_and_award_achievements
+    await db_service.get_user_by_id(user_id)
+    user_progress = await db_service.get_user_progress(user_id)
+    completed = [p for p in user_progress if p.status == ProgressStatus.COMPLETED]
+    existing = {a.type for a in await db_service.get_user_achievements(user_id)}
+    for course in await db_service.get_courses():
+        course_lessons = await db_service.get_lessons_by_course(course.id)
+        course_completed = [p for p in completed if p.courseId == course.id]
+        if len(course_completed) >= len(course_lessons) and f"course_{course.id}" not in existing:
+            break
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        for history in args.history:
+            lessons = -(-(history + args.repeat) // args.courses)
+            student = await seed(db, args.courses, lessons, history)
+            db_service = DatabaseService(db)
+            pending = [doc async for doc in db.lessons.find({}, {"_id": 0, "id": 1, "courseId": 1}).skip(history)]
+            print(f"{history} completed lessons")
+            print_row("  legacy full check", await measure(lambda: legacy_check(db_service, student.id), args.repeat))
+            events = iter(pending)
+            async def complete():
+                lesson = next(events)
+                await db_service.complete_lesson(student.id, lesson["id"], lesson["courseId"], 10)
+            print_row("  completion + rules", await measure(complete, args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+# Benchmark: GET /analytics/dashboard, sequential counts vs concurrent stats vs snapshot
+#
+# Seeds a throwaway database with a growing number of users (a share of them
+# active this week) and times the original seven sequential count_documents
+# calls, the concurrent estimated/indexed stats query, and the snapshot that
+# the route actually serves.
+#
+# Usage: python benchmarks/bench_admin_dashboard.py [--users 10000 100000] [--repeat 20]
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from common import connect, measure, print_row
+from dashboard_snapshot import DashboardSnapshot
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+
+BATCH = 10000
+
+async def seed(db, users: int, courses: int):
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    now = datetime.utcnow()
+    batch = []
+    for u in range(users):
+        user = User(
+            email=f"user{u}@bench.io", password="x", name=f"User {u}",
+            role=UserRole.TEACHER if u % 50 == 0 else UserRole.STUDENT,
+            profile=UserProfile(lastActiveDate=now - timedelta(days=random.randint(0, 30)))
+        )
+        batch.append(user.dict())
+        if len(batch) >= BATCH:
+            await db.users.insert_many(batch)
+            batch = []
+    if batch:
+        await db.users.insert_many(batch)
+    await db.courses.insert_many([
+        Course(title=f"Курс {c}", description="bench", order=c, createdBy="bench").dict()
+        for c in range(courses)
+    ])
+
+async def legacy_dashboard(db):
+    # The original implementation: one awaited query after another
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    counts = [
+        await db.users.count_documents({}),
+        await db.users.count_documents({"role": "student"}),
+        await db.users.count_documents({"role": "teacher"}),
+        await db.courses.count_documents({}),
+        await db.lessons.count_documents({}),
+        await db.classrooms.count_documents({}),
+        await db.users.count_documents({"profile.lastActiveDate": {"$gte": week_ago}})
+    ]
+    recent = [user async for user in db.users.find().sort("createdAt", -1).limit(3)]
+    recent += [course async for course in db.courses.find().sort("updatedAt", -1).limit(2)]
+    return counts, recent
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        for users in args.users:
+            await seed(db, users, args.courses)
+            db_service = DatabaseService(db)
+            snapshot = DashboardSnapshot()
+            print(f"{users} users")
+
+            counts, _ = await legacy_dashboard(db)
+            stats = await db_service.get_admin_dashboard_stats()
+            assert counts[1:3] + counts[6:] == [stats["totalStudents"], stats["totalTeachers"], stats["activeUsers"]]
+
+            print_row("sequential counts", await measure(lambda: legacy_dashboard(db), args.repeat))
+            print_row("concurrent stats", await measure(db_service.get_admin_dashboard_stats, args.repeat))
+            print_row("snapshot", await measure(lambda: snapshot.get(db_service.get_admin_dashboard_stats), args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
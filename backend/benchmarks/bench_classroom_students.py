@@ -0,0 +1,58 @@
+# Benchmark: GET /classrooms/{id}/students latency vs classroom size
+#
+# The old handler fetched every student with its own get_user_by_id, so
+# latency grew with the roster. The new one loads a page of the roster with
+# one $in query.
+#
+# Usage: python benchmarks/bench_classroom_students.py [--sizes 25 100 500 2000] [--limit 100] [--repeat 5]
+import argparse
+import asyncio
+from typing import List
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+
+async def seed(db, students: int) -> List[str]:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    users = [
+        User(email=f"student{s}@bench.io", password="x", name=f"Student {s}", role=UserRole.STUDENT)
+        for s in range(students)
+    ]
+    await db.users.insert_many([user.dict() for user in users])
+    return [user.id for user in users]
+
+async def students_per_id(db_service: DatabaseService, student_ids: List[str]):
+    students = []
+    for student_id in student_ids:
+        student = await db_service.get_user_by_id(student_id)
+        if student:
+            students.append(UserResponse(**student.dict()))
+    return students
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 100, 500, 2000])
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        student_ids = await seed(db, max(args.sizes))
+        db_service = DatabaseService(db)
+        for size in args.sizes:
+            roster = student_ids[:size]
+            print(f"classroom of {size}")
+            print_row("  per-student lookups", await measure(lambda: students_per_id(db_service, roster), args.repeat))
+            print_row("  one $in query", await measure(lambda: db_service.get_users_by_ids(roster), args.repeat))
+            print_row(f"  $in, page of {args.limit}", await measure(lambda: db_service.get_users_by_ids(roster[:args.limit]), args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+# Benchmark: GET /analytics/course/{id}, in-process loops vs per-lesson aggregation
+#
+# Seeds one course with 40 lessons and a growing number of progress
+# documents (up to 1M), then times the original implementation, which loads
+# every progress document and re-scans the list for each lesson, against the
+# $group by lessonId aggregation. Peak Python memory is measured with
+# tracemalloc; the legacy path is skipped above --legacy-max documents.
+#
+# Usage: python benchmarks/bench_course_analytics.py [--progress 10000 100000 1000000] [--repeat 3]
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+import uuid
+
+from common import connect
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+from routes.analytics import get_course_detailed_analytics
+
+BATCH = 10000
+
+async def seed(db, progress: int, lessons: int) -> Course:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    course = Course(title="Курс", description="bench", order=0, createdBy="bench")
+    lesson_list = [
+        Lesson(title=f"Урок {l}", description="bench", content="x", type=LessonType.THEORY,
+               duration=10, order=l, courseId=course.id)
+        for l in range(lessons)
+    ]
+    course.lessons = [lesson.id for lesson in lesson_list]
+    await db.courses.insert_one(course.dict())
+    await db.lessons.insert_many([lesson.dict() for lesson in lesson_list])
+
+    # Every student has a progress document on every lesson; raw dicts keep
+    # seeding a million documents fast
+    batch = []
+    for n in range(progress):
+        completed = random.random() < 0.6
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "userId": f"student-{n // lessons}",
+            "lessonId": lesson_list[n % lessons].id,
+            "courseId": course.id,
+            "classroomId": None,
+            "status": ProgressStatus.COMPLETED.value if completed else ProgressStatus.IN_PROGRESS.value,
+            "score": random.randint(0, 100) if completed else 0,
+            "timeSpent": random.randint(1, 60),
+            "completedAt": None,
+            "attempts": 1
+        })
+        if len(batch) >= BATCH:
+            await db.progress.insert_many(batch)
+            batch = []
+    if batch:
+        await db.progress.insert_many(batch)
+    return course
+
+async def legacy_analytics(db_service: DatabaseService, course: Course) -> dict:
+    # The original implementation: every progress document as a model,
+    # re-scanned twice per lesson
+    all_progress = [Progress(**progress) async for progress in db_service.db.progress.find({"courseId": course.id})]
+    lessons = await db_service.get_lesson_summaries_by_course(course.id)
+    total_students = len(set(p.userId for p in all_progress))
+    completed_progress = [p for p in all_progress if p.status == ProgressStatus.COMPLETED]
+    lesson_stats = []
+    for lesson in lessons:
+        lesson_progress = [p for p in all_progress if p.lessonId == lesson.id]
+        lesson_completed = [p for p in lesson_progress if p.status == ProgressStatus.COMPLETED]
+        lesson_stats.append({
+            "lessonId": lesson.id,
+            "lessonTitle": lesson.title,
+            "totalAttempts": len(lesson_progress),
+            "completions": len(lesson_completed),
+            "completionRate": (len(lesson_completed) / len(lesson_progress) * 100) if lesson_progress else 0,
+            "averageScore": sum(p.score for p in lesson_completed) / len(lesson_completed) if lesson_completed else 0
+        })
+    return {
+        "courseId": course.id,
+        "courseName": course.title,
+        "totalStudents": total_students,
+        "totalLessons": len(lessons),
+        "totalCompletions": len(completed_progress),
+        "averageCompletion": (len(completed_progress) / (total_students * len(lessons)) * 100) if total_students and lessons else 0,
+        "lessonStats": lesson_stats
+    }
+
+async def profile(func, repeat: int):
+    """Best wall time in ms and peak traced Python memory in MB."""
+    best = None
+    tracemalloc.start()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak / 1024 / 1024
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--progress", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--lessons", type=int, default=40)
+    parser.add_argument("--legacy-max", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    admin = User(email="admin@bench.io", password="x", name="Admin", role=UserRole.ADMIN)
+    client, db = connect()
+    try:
+        print(f"{'progress':>9} {'legacy ms':>10} {'legacy MB':>10} {'aggregate ms':>13} {'aggregate MB':>13}")
+        for progress in args.progress:
+            course = await seed(db, progress, args.lessons)
+            db_service = DatabaseService(db)
+
+            current, current_ms, current_mb = await profile(
+                lambda: get_course_detailed_analytics(course.id, current_user=admin, db_service=db_service), args.repeat
+            )
+            if progress <= args.legacy_max:
+                legacy, legacy_ms, legacy_mb = await profile(lambda: legacy_analytics(db_service, course), args.repeat)
+                assert legacy == current, "aggregation differs from the legacy result"
+                legacy_cols = f"{legacy_ms:10.1f} {legacy_mb:10.1f}"
+            else:
+                legacy_cols = f"{'-':>10} {'-':>10}"
+            print(f"{progress:9} {legacy_cols} {current_ms:13.1f} {current_mb:13.2f}")
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+# Benchmark: GET /progress/dashboard, per-course N+1 loop vs fixed query set
+#
+# Seeds a throwaway database with 50 courses x 40 lessons and a student who
+# has progress on part of the catalog, then times both implementations.
+#
+# Usage: python benchmarks/bench_dashboard.py [--courses 50] [--lessons 40] [--repeat 50]
+import argparse
+import asyncio
+import random
+
+from common import connect, measure, lesson_content, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+from progress_rollups import rebuild_rollups
+from routes.progress import get_progress_dashboard
+
+async def seed(db, courses: int, lessons: int) -> User:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    student = User(email="bench@student.io", password="x", name="Bench", role=UserRole.STUDENT)
+    await db.users.insert_one(student.dict())
+
+    lesson_docs, progress_docs = [], []
+    for c in range(courses):
+        course = Course(title=f"Курс {c}", description="bench", order=c, createdBy="bench")
+        for l in range(lessons):
+            lesson = Lesson(
+                title=f"Урок {l}", description="bench", content=lesson_content(l), type=LessonType.CODING,
+                duration=30, order=l, courseId=course.id,
+                codingChallenge=CodingChallenge(template="package main", solution="package main\n" * 40)
+            )
+            course.lessons.append(lesson.id)
+            lesson_docs.append(lesson.dict())
+            if random.random() < 0.3:
+                status = random.choice([ProgressStatus.IN_PROGRESS, ProgressStatus.COMPLETED])
+                progress_docs.append(Progress(userId=student.id, lessonId=lesson.id, courseId=course.id, status=status).dict())
+        await db.courses.insert_one(course.dict())
+
+    await db.lessons.insert_many(lesson_docs)
+    if progress_docs:
+        await db.progress.insert_many(progress_docs)
+    await rebuild_rollups(db)
+    return student
+
+async def legacy_dashboard(current_user: User, db_service: DatabaseService):
+    # The original implementation: one lesson query per course
+    user_progress = await db_service.get_user_progress(current_user.id)
+    completed_lessons = len([p for p in user_progress if p.status == ProgressStatus.COMPLETED])
+    courses = await db_service.get_courses()
+    course_progress = []
+    for course in courses:
+        course_lessons = await db_service.get_lessons_by_course(course.id)
+        course_user_progress = [p for p in user_progress if p.courseId == course.id]
+        completed_course_lessons = len([p for p in course_user_progress if p.status == ProgressStatus.COMPLETED])
+        course_progress.append({
+            "courseId": course.id,
+            "totalLessons": len(course_lessons),
+            "completedLessons": completed_course_lessons
+        })
+    achievements = await db_service.get_user_achievements(current_user.id)
+    return {"completedLessons": completed_lessons, "courseProgress": course_progress, "recent": achievements[:3]}
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--lessons", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        student = await seed(db, args.courses, args.lessons)
+        db_service = DatabaseService(db)
+        print(f"{args.courses} courses x {args.lessons} lessons")
+
+        legacy = await legacy_dashboard(student, db_service)
+        current = await get_progress_dashboard(current_user=student, db_service=db_service)
+        assert legacy["completedLessons"] == current["completedLessons"]
+        assert [c["totalLessons"] for c in legacy["courseProgress"]] == [c["totalLessons"] for c in current["courseProgress"]]
+
+        print_row("legacy (N+1 per course)", await measure(lambda: legacy_dashboard(student, db_service), args.repeat))
+        print_row("fixed query set", await measure(lambda: get_progress_dashboard(current_user=student, db_service=db_service), args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+# Benchmark: GET /analytics/courses, $lookup from courses vs progress-side $group
+#
+# Seeds 20 courses x 40 lessons and a growing number of progress documents,
+# then times the original pipeline, which embeds every progress row of a
+# course into the course document, against the two-step $group over the
+# progress collection. The old pipeline fails once a course's embedded
+# progress exceeds the document or stage memory limits; that is reported
+# instead of a time.
+#
+# Usage: python benchmarks/bench_global_course_analytics.py [--progress 10000 100000 1000000] [--repeat 3]
+import argparse
+import asyncio
+import random
+import uuid
+
+from pymongo.errors import OperationFailure
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+
+BATCH = 10000
+
+LEGACY_PIPELINE = [
+    {"$lookup": {
+        "from": "progress",
+        "localField": "id",
+        "foreignField": "courseId",
+        "as": "progress"
+    }},
+    {"$project": {
+        "courseId": "$id",
+        "courseName": "$title",
+        "totalLessons": {"$size": "$lessons"},
+        "totalStudents": {"$size": {"$setUnion": ["$progress.userId"]}},
+        "completedProgress": {"$size": {"$filter": {
+            "input": "$progress",
+            "cond": {"$eq": ["$$this.status", "completed"]}
+        }}},
+        "totalProgress": {"$size": "$progress"}
+    }},
+    {"$addFields": {
+        "averageCompletion": {"$cond": [
+            {"$eq": ["$totalProgress", 0]},
+            0,
+            {"$multiply": [{"$divide": ["$completedProgress", "$totalProgress"]}, 100]}
+        ]}
+    }}
+]
+
+async def seed(db, progress: int, courses: int, lessons: int):
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    course_list = []
+    for c in range(courses):
+        course = Course(title=f"Курс {c}", description="bench", order=c, createdBy="bench")
+        course.lessons = [str(uuid.uuid4()) for _ in range(lessons)]
+        course_list.append(course)
+    # One course stays without progress
+    await db.courses.insert_many([course.dict() for course in course_list])
+
+    # Students work through a course lesson by lesson; (userId, lessonId)
+    # stays unique as the progress index requires
+    batch = []
+    for n in range(progress):
+        course = course_list[n % (courses - 1)]
+        k = n // (courses - 1)
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "userId": f"student-{k // lessons}",
+            "lessonId": course.lessons[k % lessons],
+            "courseId": course.id,
+            "status": random.choice([ProgressStatus.COMPLETED.value, ProgressStatus.IN_PROGRESS.value]),
+            "score": 0,
+            "timeSpent": 1
+        })
+        if len(batch) >= BATCH:
+            await db.progress.insert_many(batch)
+            batch = []
+    if batch:
+        await db.progress.insert_many(batch)
+
+async def legacy_analytics(db):
+    return [doc async for doc in db.courses.aggregate(LEGACY_PIPELINE)]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--progress", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        for progress in args.progress:
+            await seed(db, progress, args.courses, args.lessons)
+            db_service = DatabaseService(db)
+            print(f"{progress} progress documents over {args.courses} courses")
+
+            current = {row.courseId: row for row in await db_service.get_course_analytics()}
+            try:
+                legacy = await legacy_analytics(db)
+            except OperationFailure as e:
+                print(f"{'$lookup pipeline':28} failed: {e.details.get('codeName', e.code) if e.details else e}")
+            else:
+                for row in legacy:
+                    expected = current[row["courseId"]]
+                    assert (row["totalStudents"], row["totalLessons"]) == (expected.totalStudents, expected.totalLessons)
+                    assert round(row["averageCompletion"]) == expected.averageCompletion
+                print_row("$lookup pipeline", await measure(lambda: legacy_analytics(db), args.repeat))
+            print_row("progress-side $group", await measure(db_service.get_course_analytics, args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+# Benchmark: per-user progress totals from the progress history vs rollups
+#
+# The dashboard, student analytics and achievement checks used to group or
+# load every progress document of the user. Rollups keep one document per
+# (user, course), so reads cost O(courses); every progress write pays one
+# extra upsert to keep them current.
+#
+# Usage: python benchmarks/bench_progress_rollups.py [--courses 20] [--lessons 200] [--repeat 20]
+import argparse
+import asyncio
+import random
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+from progress_rollups import rebuild_rollups
+
+async def seed(db, courses: int, lessons: int) -> User:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    student = User(email="bench@student.io", password="x", name="Bench", role=UserRole.STUDENT)
+    await db.users.insert_one(student.dict())
+    progress_docs = [
+        Progress(
+            userId=student.id, lessonId=f"lesson-{c}-{l}", courseId=f"course-{c}",
+            status=random.choice([ProgressStatus.IN_PROGRESS, ProgressStatus.COMPLETED]),
+            score=random.randint(0, 100), timeSpent=random.randint(1, 30)
+        ).dict()
+        for c in range(courses) for l in range(lessons)
+    ]
+    await db.progress.insert_many(progress_docs)
+    await rebuild_rollups(db)
+    return student
+
+async def totals_from_history(db_service: DatabaseService, user_id: str):
+    # What get_student_analytics did: materialize the whole history
+    history = await db_service.get_user_progress(user_id)
+    totals = {}
+    for progress in history:
+        course = totals.setdefault(progress.courseId, {"lessons": 0, "completed": 0, "timeSpent": 0})
+        course["lessons"] += 1
+        course["completed"] += progress.status == ProgressStatus.COMPLETED
+        course["timeSpent"] += progress.timeSpent
+    return totals
+
+async def totals_from_aggregation(db_service: DatabaseService, user_id: str):
+    # What the dashboard did: group the history on the server
+    pipeline = [
+        {"$match": {"userId": user_id}},
+        {"$group": {
+            "_id": "$courseId",
+            "total": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}}
+        }}
+    ]
+    return [doc async for doc in db_service.db.progress.aggregate(pipeline)]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--lessons", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        student = await seed(db, args.courses, args.lessons)
+        db_service = DatabaseService(db)
+        print(f"{args.courses * args.lessons} progress documents over {args.courses} courses")
+
+        history = await totals_from_history(db_service, student.id)
+        rollups = {rollup.courseId: rollup for rollup in await db_service.get_progress_rollups(student.id)}
+        assert all(rollups[course_id].completed == totals["completed"] for course_id, totals in history.items())
+
+        print_row("load full history", await measure(lambda: totals_from_history(db_service, student.id), args.repeat))
+        print_row("$group over history", await measure(lambda: totals_from_aggregation(db_service, student.id), args.repeat))
+        print_row("read rollups", await measure(lambda: db_service.get_progress_rollups(student.id), args.repeat))
+
+        lesson_ids = iter(range(args.repeat))
+        print_row("complete_lesson (+rollup)", await measure(
+            lambda: db_service.complete_lesson(student.id, f"lesson-0-{next(lesson_ids)}", "course-0", 90), args.repeat
+        ))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
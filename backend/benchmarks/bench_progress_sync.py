@@ -0,0 +1,86 @@
+# Benchmark: offline progress sync, per-event requests vs POST /progress/batch
+#
+# Replays the events of a tablet that was offline: every event used to be a
+# POST /progress/ plus a PUT /progress/{id}, each authenticating and checking
+# the lesson. The batch path validates lessons with one $in query, folds
+# the events into one upsert per lesson and runs those concurrently.
+#
+# Usage: python benchmarks/bench_progress_sync.py [--events 300] [--repeat 5]
+import argparse
+import asyncio
+import random
+from typing import List, Tuple
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+
+async def seed(db, lessons: int) -> Tuple[User, List[Lesson]]:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    student = User(email="bench@student.io", password="x", name="Bench", role=UserRole.STUDENT)
+    await db.users.insert_one(student.dict())
+    course = Course(title="Курс", description="bench", order=0, createdBy="bench")
+    lesson_list = [
+        Lesson(title=f"Урок {l}", description="bench", content="x", type=LessonType.THEORY,
+               duration=10, order=l, courseId=course.id)
+        for l in range(lessons)
+    ]
+    await db.courses.insert_one(course.dict())
+    await db.lessons.insert_many([lesson.dict() for lesson in lesson_list])
+    return student, lesson_list
+
+def make_events(lessons: List[Lesson], count: int) -> List[ProgressEvent]:
+    return [
+        ProgressEvent(
+            lessonId=random.choice(lessons).id,
+            status=random.choice([ProgressStatus.IN_PROGRESS, ProgressStatus.COMPLETED]),
+            score=random.randint(0, 10),
+            timeSpent=random.randint(1, 30)
+        )
+        for _ in range(count)
+    ]
+
+async def sync_per_event(db_service: DatabaseService, student: User, events: List[ProgressEvent]):
+    for event in events:
+        # POST /progress/: auth lookup, lesson check, upsert
+        await db_service.get_user_by_email(student.email)
+        lesson = await db_service.get_lesson_by_id(event.lessonId)
+        progress = await db_service.create_or_update_progress(
+            student.id, ProgressCreate(lessonId=event.lessonId, courseId=lesson.courseId)
+        )
+        # PUT /progress/{id}: auth lookup, ownership read, update, re-read
+        await db_service.get_user_by_email(student.email)
+        await db_service.db.progress.find_one({"id": progress.id})
+        await db_service.update_progress(progress.id, ProgressUpdate(**event.dict(include={"status", "score", "timeSpent"})))
+        await db_service.db.progress.find_one({"id": progress.id})
+
+async def sync_batch(db_service: DatabaseService, student: User, events: List[ProgressEvent]):
+    await db_service.get_user_by_email(student.email)
+    course_ids = await db_service.get_lesson_course_ids(list({event.lessonId for event in events}))
+    await db_service.apply_progress_events(student.id, events, course_ids)
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--lessons", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        student, lessons = await seed(db, args.lessons)
+        db_service = DatabaseService(db)
+        events = make_events(lessons, args.events)
+        print(f"{args.events} events over {args.lessons} lessons")
+
+        print_row("per-event requests", await measure(lambda: sync_per_event(db_service, student, events), args.repeat))
+        print_row("batch endpoint", await measure(lambda: sync_batch(db_service, student, events), args.repeat))
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
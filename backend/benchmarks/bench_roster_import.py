@@ -0,0 +1,86 @@
+# Benchmark: filling classrooms, one join per student vs bulk roster import
+#
+# The old path enrolled students one at a time: each join authenticated the
+# student, re-read the whole classroom to check its size and pushed a single
+# id onto the embedded roster. The roster import resolves every email with
+# one $in query, reserves the seats with one capacity-checked update and
+# inserts the enrollments in one batch.
+#
+# Usage: python benchmarks/bench_roster_import.py [--students 500] [--classrooms 20] [--repeat 5]
+import argparse
+import asyncio
+from typing import List
+
+from common import connect, measure, print_row
+from database import DatabaseService
+from indexes import ensure_indexes
+from models import *
+
+async def seed(db, students: int) -> List[User]:
+    await db.client.drop_database(db.name)
+    await ensure_indexes(db)
+
+    users = [
+        User(email=f"student{s}@bench.io", password="x", name=f"Student {s}", role=UserRole.STUDENT)
+        for s in range(students)
+    ]
+    await db.users.insert_many([user.dict() for user in users])
+    return users
+
+async def reset_classrooms(db_service: DatabaseService, classrooms: int, size: int) -> List[Classroom]:
+    await db_service.db.classrooms.delete_many({})
+    await db_service.db.enrollments.delete_many({})
+    return [
+        await db_service.create_classroom(
+            ClassroomCreate(name=f"Класс {c}", description="bench", maxStudents=size), "bench-teacher"
+        )
+        for c in range(classrooms)
+    ]
+
+async def enroll_per_join(db_service: DatabaseService, rosters: List[List[str]], classrooms: List[Classroom]):
+    for classroom, emails in zip(classrooms, rosters):
+        for email in emails:
+            # POST /classrooms/{id}/join: auth lookup, full classroom read, push
+            student = await db_service.get_user_by_email(email)
+            current = await db_service.db.classrooms.find_one({"id": classroom.id})
+            if len(current.get("students", [])) >= current["maxStudents"]:
+                continue
+            await db_service.db.classrooms.update_one(
+                {"id": classroom.id, "students": {"$ne": student.id}},
+                {"$push": {"students": student.id}}
+            )
+
+async def enroll_bulk(db_service: DatabaseService, rosters: List[List[str]], classrooms: List[Classroom]):
+    for classroom, emails in zip(classrooms, rosters):
+        # POST /classrooms/{id}/roster: one $in lookup, one update
+        users = await db_service.get_users_by_emails(emails)
+        await db_service.enroll_students(classroom.id, [users[email.lower()]["id"] for email in emails])
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--classrooms", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        users = await seed(db, args.students)
+        db_service = DatabaseService(db)
+        size = -(-args.students // args.classrooms)
+        rosters = [[user.email for user in users[c * size:(c + 1) * size]] for c in range(args.classrooms)]
+        print(f"{args.students} students across {args.classrooms} classrooms of {size}")
+
+        for name, enroll in [("per-student joins", enroll_per_join), ("bulk roster import", enroll_bulk)]:
+            async def run():
+                classrooms = await reset_classrooms(db_service, args.classrooms, size)
+                await enroll(db_service, rosters, classrooms)
+            print_row(name, await measure(run, args.repeat))
+
+        assert await db.enrollments.count_documents({}) == args.students
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+# Benchmark: grading latency vs number of test cases
+#
+# Grades one submission against challenges with a growing number of test
+# cases, running the cases one at a time, concurrently, and batched into a
+# single process.
+#
+# Usage: python benchmarks/bench_test_cases.py [--cases 1 8 32] [--repeat 5]
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics import LatencyRecorder
+from models import CodingChallenge, TestCase
+from go_runner import GoRunner, BATCH_SEPARATOR
+
+SOURCE = """package main
+
+import (
+	"bufio"
+	"fmt"
+	"os"
+)
+
+func main() {
+	in := bufio.NewReader(os.Stdin)
+	cases := 1
+	if %(batch)s {
+		fmt.Fscan(in, &cases)
+	}
+	for i := 0; i < cases; i++ {
+		var a, b int
+		fmt.Fscan(in, &a, &b)
+		fmt.Println(a + b)
+		if %(batch)s {
+			fmt.Println("%(separator)s")
+		}
+	}
+}
+"""
+
+def challenge(cases: int, batch: bool) -> CodingChallenge:
+    return CodingChallenge(
+        template="",
+        solution="",
+        batchMode=batch,
+        testCases=[TestCase(input=f"{i} {i * 2}", expectedOutput=str(i * 3)) for i in range(cases)]
+    )
+
+async def measure(runner: GoRunner, cases: int, batch: bool, repeat: int) -> dict:
+    code = SOURCE % {"batch": "true" if batch else "false", "separator": BATCH_SEPARATOR}
+    recorder = LatencyRecorder(window=repeat)
+    # First grade compiles; later ones reuse the cached binary. No lesson
+    # id, so verdicts are never served from the cache
+    assert (await runner.grade(challenge(cases, batch), code)).testsPass
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await runner.grade(challenge(cases, batch), code)
+        recorder.record(time.perf_counter() - started)
+        assert result.testsPass, result
+    return recorder.snapshot()
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sequential = GoRunner(workers=1, run_concurrency=1)
+    parallel = GoRunner(workers=1, run_concurrency=args.concurrency)
+    await sequential.start()
+    await parallel.start()
+
+    print(f"{'cases':>5} {'sequential p50':>15} {'parallel x' + str(args.concurrency) + ' p50':>16} {'batch p50':>10}  (ms)")
+    for cases in args.cases:
+        one = await measure(sequential, cases, False, args.repeat)
+        many = await measure(parallel, cases, False, args.repeat)
+        batch = await measure(parallel, cases, True, args.repeat)
+        print(f"{cases:5} {one['p50Ms']:15.1f} {many['p50Ms']:16.1f} {batch['p50Ms']:10.1f}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
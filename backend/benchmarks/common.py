@@ -0,0 +1,37 @@
+# Shared helpers for the MongoDB-backed benchmarks
+import os
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from metrics import LatencyRecorder
+
+load_dotenv(BACKEND_DIR / '.env')
+
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "go_academy_bench")
+
+def connect(db_name: str = BENCH_DB_NAME):
+    """Connect to MONGO_URL; benchmarks always use a throwaway database."""
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    return client, client[db_name]
+
+async def measure(func, repeat: int) -> dict:
+    recorder = LatencyRecorder(window=repeat)
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        recorder.record(time.perf_counter() - started)
+    return recorder.snapshot()
+
+def lesson_content(index: int, size: int = 4000) -> str:
+    paragraph = f"## Раздел {index}\n\nfmt.Println(\"Hello, World!\") — пример кода на Go.\n\n"
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+def print_row(name: str, stats: dict):
+    print(f"{name:28} n={stats['count']:4} avg {stats['avgMs']:9.2f} ms  p50 {stats['p50Ms']:9.2f} ms  "
+          f"p99 {stats['p99Ms']:9.2f} ms")
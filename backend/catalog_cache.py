@@ -0,0 +1,96 @@
+# Read-through cache for courses and lessons
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from typing import Any, Dict, Hashable, Optional
+import os
+import time
+
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# How often a worker re-reads the shared version stamp to notice writes made
+# by other workers. 0 trusts the local stamp forever (single worker only).
+CATALOG_CACHE_POLL_SECONDS = float(os.getenv("CATALOG_CACHE_POLL_SECONDS", "5"))
+CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "5000"))
+
+class CatalogCache:
+    """Versioned in-memory cache of catalog reads.
+
+    Every admin write bumps the catalog version stamp stored in the meta
+    collection and clears the local entries. Other workers pick up the new
+    stamp on their next poll. Cached values are shared between requests and
+    must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = CATALOG_CACHE_ENABLED,
+        poll_seconds: float = CATALOG_CACHE_POLL_SECONDS,
+        max_entries: int = CATALOG_CACHE_MAX_ENTRIES
+    ):
+        self.enabled = enabled
+        self.poll_seconds = poll_seconds
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self._checked_at = 0.0
+        self._entries: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_version(self, db: AsyncIOMotorDatabase) -> int:
+        now = time.monotonic()
+        if self.version is None or (self.poll_seconds > 0 and now - self._checked_at >= self.poll_seconds):
+            doc = await db.meta.find_one({"_id": "catalog"})
+            self._set_version(doc["version"] if doc else 0)
+            self._checked_at = now
+        return self.version
+
+    async def get(self, db: AsyncIOMotorDatabase, key: Hashable) -> Any:
+        if not self.enabled:
+            return None
+        await self.get_version(db)
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, version: int):
+        # Drop results read before a concurrent invalidation
+        if not self.enabled or value is None or version != self.version:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = value
+
+    async def invalidate(self, db: AsyncIOMotorDatabase) -> int:
+        doc = await db.meta.find_one_and_update(
+            {"_id": "catalog"},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self.invalidations += 1
+        self._set_version(doc["version"])
+        self._checked_at = time.monotonic()
+        return self.version
+
+    def _set_version(self, version: int):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared by every DatabaseService instance in this process
+catalog_cache = CatalogCache()
@@ -0,0 +1,80 @@
+# Short-lived snapshots of the admin analytics views
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_SNAPSHOT_TTL_SECONDS = float(os.getenv("DASHBOARD_SNAPSHOT_TTL_SECONDS", "30"))
+# 0 recomputes the course analytics on every request
+COURSE_ANALYTICS_CACHE_SECONDS = float(os.getenv("COURSE_ANALYTICS_CACHE_SECONDS", "60"))
+
+class DashboardSnapshot:
+    """Caches an analytics result for a few seconds.
+
+    Only one load runs at a time: concurrent requests wait for the same
+    load instead of each scanning the collections. Once the snapshot is
+    older than the TTL it is still served while a background load replaces
+    it, so only the very first request of a process waits for a load.
+    """
+
+    def __init__(self, ttl_seconds: float = DASHBOARD_SNAPSHOT_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._value: Any = None
+        self._loaded_at = 0.0
+        self._loading: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+
+    async def get(self, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self.ttl_seconds <= 0:
+            return await load()
+        if self._value is not None:
+            if time.monotonic() - self._loaded_at < self.ttl_seconds:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._start_load(load)
+            return self._value
+        return await asyncio.shield(self._start_load(load))
+
+    def _start_load(self, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load(load))
+        return self._loading
+
+    async def _load(self, load: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            value = await load()
+        except Exception:
+            # Keep serving the previous snapshot; the next request retries
+            logger.exception("Dashboard snapshot load failed")
+            if self._value is None:
+                raise
+            return self._value
+        finally:
+            self._loading = None
+        self._value = value
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+        self.load_seconds = round(self._loaded_at - started, 4)
+        return value
+
+    def stats(self) -> dict:
+        return {
+            "ttlSeconds": self.ttl_seconds,
+            "ageSeconds": round(time.monotonic() - self._loaded_at, 1) if self._value is not None else None,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "loads": self.loads,
+            "lastLoadSeconds": self.load_seconds
+        }
+
+# Shared by every analytics request in this process
+dashboard_snapshot = DashboardSnapshot()
+course_analytics_snapshot = DashboardSnapshot(ttl_seconds=COURSE_ANALYTICS_CACHE_SECONDS)
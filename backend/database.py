@@ -1,15 +1,67 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
-from typing import List, Optional, Dict, Any
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from typing import List, Optional, Dict, Any, Tuple
 from models import *
+from user_cache import user_cache
+from token_versions import token_versions
+from catalog_cache import catalog_cache
+from grader_cache import grader_cache
+from achievement_rules import evaluate_achievements
+from progress_rollups import apply_update, rebuild_rollups, rollup_delta, sum_deltas
+from metrics import LatencyRecorder
 from datetime import datetime, timedelta
+import asyncio
 import os
 import random
 import string
+import time
+
+# Projections for the lightweight query paths
+LESSON_SUMMARY_PROJECTION = {"_id": 0, "content": 0, "codingChallenge": 0}
+COURSE_SUMMARY_PROJECTION = {"_id": 0, "id": 1, "title": 1, "order": 1}
+USER_PUBLIC_PROJECTION = {"_id": 0, "password": 0}
+# Leaves out the legacy embedded roster of classrooms created before enrollments
+CLASSROOM_PROJECTION = {"_id": 0, "students": 0}
+
+# "auto" uses transactions when connected to a replica set or mongos
+MONGO_TRANSACTIONS = os.getenv("MONGO_TRANSACTIONS", "auto").lower()
+
+# Progress upserts of one batch sync in flight at once
+PROGRESS_WRITE_CONCURRENCY = int(os.getenv("PROGRESS_WRITE_CONCURRENCY", "16"))
+
+# "dual" also keeps the legacy classrooms.students array up to date, so an
+# older release can still run against the same database during a rollout
+CLASSROOM_MEMBERSHIP = os.getenv("CLASSROOM_MEMBERSHIP", "enrollments").lower()
+
+# Recent submission job ids remembered on progress documents and users, so a
+# retried commit of the same job is not applied twice
+COMMIT_JOB_IDS_KEPT = 20
+
+# Submission commit metrics, shared by every DatabaseService in this process
+commit_latency = LatencyRecorder()
+commit_counts = {"transaction": 0, "sequential": 0}
 
 class DatabaseService:
+    # Detected once per process, see _supports_transactions
+    _transactions_supported: Optional[bool] = None
+    
     def __init__(self, db: AsyncIOMotorDatabase):
         self.db = db
     
+    async def _catalog_read(self, key: tuple, load):
+        # Read-through the process-wide catalog cache
+        cached = await catalog_cache.get(self.db, key)
+        if cached is not None:
+            return cached
+        version = catalog_cache.version
+        value = await load()
+        catalog_cache.set(key, value, version)
+        return value
+    
+    async def get_catalog_version(self) -> int:
+        return await catalog_cache.get_version(self.db)
+    
     # User Operations
     async def create_user(self, user: User) -> User:
         user_dict = user.dict()
@@ -28,31 +80,89 @@ class DatabaseService:
             return User(**user_data)
         return None
     
+    async def get_users_by_ids(self, user_ids: List[str]) -> List[UserResponse]:
+        """Fetch users with one $in query, in the order of user_ids; unknown ids are skipped."""
+        if not user_ids:
+            return []
+        cursor = self.db.users.find({"id": {"$in": user_ids}}, USER_PUBLIC_PROJECTION)
+        users = {user["id"]: user async for user in cursor}
+        return [UserResponse(**users[user_id]) for user_id in user_ids if user_id in users]
+    
+    async def get_users_by_emails(self, emails: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve emails to {lowercased email: {id, email, role}} in one query."""
+        candidates = list({variant for email in emails for variant in (email, email.lower())})
+        cursor = self.db.users.find(
+            {"email": {"$in": candidates}},
+            {"_id": 0, "id": 1, "email": 1, "role": 1}
+        )
+        return {user["email"].lower(): user async for user in cursor}
+    
+    async def update_user(self, user_id: str, user_update: dict) -> bool:
+        result = await self.db.users.update_one(
+            {"id": user_id},
+            {"$set": user_update}
+        )
+        user_cache.invalidate_user(user_id)
+        # Identity fields are embedded in claims-mode tokens
+        if {"email", "role"} & user_update.keys():
+            await token_versions.bump(self.db, user_id)
+        return result.modified_count > 0
+    
     async def update_user_profile(self, user_id: str, profile_update: dict) -> bool:
         result = await self.db.users.update_one(
             {"id": user_id},
             {"$set": {f"profile.{k}": v for k, v in profile_update.items()}}
         )
+        user_cache.invalidate_user(user_id)
+        return result.modified_count > 0
+    
+    async def add_user_xp(self, user_id: str, points: int, session=None, job_id: Optional[str] = None) -> bool:
+        # Atomic increment; never derive XP from a previously read user.
+        # With a job id the increment happens at most once per job
+        query = {"id": user_id}
+        update = {"$inc": {"profile.totalXP": points}}
+        if job_id:
+            query["xpJobIds"] = {"$ne": job_id}
+            update["$push"] = {"xpJobIds": {"$each": [job_id], "$slice": -COMMIT_JOB_IDS_KEPT}}
+        result = await self.db.users.update_one(query, update, session=session)
+        user_cache.invalidate_user(user_id)
         return result.modified_count > 0
     
     # Course Operations
     async def create_course(self, course: Course) -> Course:
         course_dict = course.dict()
         await self.db.courses.insert_one(course_dict)
+        await catalog_cache.invalidate(self.db)
         return course
     
     async def get_courses(self, skip: int = 0, limit: int = 100) -> List[Course]:
-        cursor = self.db.courses.find().skip(skip).limit(limit).sort("order", 1)
-        courses = []
-        async for course_data in cursor:
-            courses.append(Course(**course_data))
-        return courses
+        async def load():
+            cursor = self.db.courses.find().skip(skip).limit(limit).sort("order", 1)
+            courses = []
+            async for course_data in cursor:
+                courses.append(Course(**course_data))
+            return courses
+        
+        return await self._catalog_read(("courses", skip, limit), load)
+    
+    async def get_course_summaries(self, skip: int = 0, limit: int = 100) -> List[CourseSummary]:
+        async def load():
+            cursor = self.db.courses.find({}, COURSE_SUMMARY_PROJECTION).skip(skip).limit(limit).sort("order", 1)
+            courses = []
+            async for course_data in cursor:
+                courses.append(CourseSummary(**course_data))
+            return courses
+        
+        return await self._catalog_read(("course_summaries", skip, limit), load)
     
     async def get_course_by_id(self, course_id: str) -> Optional[Course]:
-        course_data = await self.db.courses.find_one({"id": course_id})
-        if course_data:
-            return Course(**course_data)
-        return None
+        async def load():
+            course_data = await self.db.courses.find_one({"id": course_id})
+            if course_data:
+                return Course(**course_data)
+            return None
+        
+        return await self._catalog_read(("course", course_id), load)
     
     async def update_course(self, course_id: str, course_update: CourseUpdate) -> bool:
         update_data = {k: v for k, v in course_update.dict().items() if v is not None}
@@ -62,10 +172,12 @@ class DatabaseService:
             {"id": course_id},
             {"$set": update_data}
         )
+        await catalog_cache.invalidate(self.db)
         return result.modified_count > 0
     
     async def delete_course(self, course_id: str) -> bool:
         result = await self.db.courses.delete_one({"id": course_id})
+        await catalog_cache.invalidate(self.db)
         return result.deleted_count > 0
     
     # Lesson Operations
@@ -78,21 +190,60 @@ class DatabaseService:
             {"id": lesson.courseId},
             {"$push": {"lessons": lesson.id}}
         )
+        await catalog_cache.invalidate(self.db)
         
         return lesson
     
     async def get_lessons_by_course(self, course_id: str) -> List[Lesson]:
-        cursor = self.db.lessons.find({"courseId": course_id}).sort("order", 1)
-        lessons = []
-        async for lesson_data in cursor:
-            lessons.append(Lesson(**lesson_data))
-        return lessons
+        async def load():
+            cursor = self.db.lessons.find({"courseId": course_id}).sort("order", 1)
+            lessons = []
+            async for lesson_data in cursor:
+                lessons.append(Lesson(**lesson_data))
+            return lessons
+        
+        return await self._catalog_read(("lessons", course_id), load)
+    
+    async def get_lesson_summaries_by_course(self, course_id: str) -> List[LessonSummary]:
+        async def load():
+            cursor = self.db.lessons.find({"courseId": course_id}, LESSON_SUMMARY_PROJECTION).sort("order", 1)
+            lessons = []
+            async for lesson_data in cursor:
+                lessons.append(LessonSummary(**lesson_data))
+            return lessons
+        
+        return await self._catalog_read(("lesson_summaries", course_id), load)
+    
+    async def get_lesson_counts_by_course(self) -> Dict[str, int]:
+        async def load():
+            pipeline = [{"$group": {"_id": "$courseId", "count": {"$sum": 1}}}]
+            counts = {}
+            async for doc in self.db.lessons.aggregate(pipeline):
+                counts[doc["_id"]] = doc["count"]
+            return counts
+        
+        return await self._catalog_read(("lesson_counts",), load)
+    
+    async def get_coding_lesson_ids(self) -> List[str]:
+        async def load():
+            cursor = self.db.lessons.find({"type": LessonType.CODING.value}, {"_id": 0, "id": 1})
+            return [lesson_data["id"] async for lesson_data in cursor]
+        
+        return await self._catalog_read(("coding_lesson_ids",), load)
+    
+    async def get_lesson_course_ids(self, lesson_ids: List[str]) -> Dict[str, str]:
+        # lessonId -> courseId for the lessons that exist, in one query
+        cursor = self.db.lessons.find({"id": {"$in": lesson_ids}}, {"_id": 0, "id": 1, "courseId": 1})
+        return {lesson_data["id"]: lesson_data["courseId"] async for lesson_data in cursor}
     
     async def get_lesson_by_id(self, lesson_id: str) -> Optional[Lesson]:
-        lesson_data = await self.db.lessons.find_one({"id": lesson_id})
-        if lesson_data:
-            return Lesson(**lesson_data)
-        return None
+        async def load():
+            lesson_data = await self.db.lessons.find_one({"id": lesson_id})
+            if lesson_data:
+                return Lesson(**lesson_data)
+            return None
+        
+        return await self._catalog_read(("lesson", lesson_id), load)
     
     async def update_lesson(self, lesson_id: str, lesson_update: LessonUpdate) -> bool:
         update_data = {k: v for k, v in lesson_update.dict().items() if v is not None}
@@ -102,18 +253,35 @@ class DatabaseService:
             {"id": lesson_id},
             {"$set": update_data}
         )
+        await catalog_cache.invalidate(self.db)
+        if lesson_update.codingChallenge is not None:
+            grader_cache.invalidate_lesson(lesson_id)
         return result.modified_count > 0
     
+    async def reorder_lessons(self, course_id: str, lesson_ids: List[str]) -> int:
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({"id": lesson_id, "courseId": course_id}, {"$set": {"order": index + 1, "updatedAt": now}})
+            for index, lesson_id in enumerate(lesson_ids)
+        ]
+        if not operations:
+            return 0
+        result = await self.db.lessons.bulk_write(operations, ordered=False)
+        await catalog_cache.invalidate(self.db)
+        return result.modified_count
+    
     async def delete_lesson(self, lesson_id: str) -> bool:
         # Get lesson to remove from course
-        lesson = await self.get_lesson_by_id(lesson_id)
+        lesson = await self.db.lessons.find_one({"id": lesson_id}, {"_id": 0, "courseId": 1})
         if lesson:
             await self.db.courses.update_one(
-                {"id": lesson.courseId},
+                {"id": lesson["courseId"]},
                 {"$pull": {"lessons": lesson_id}}
             )
         
         result = await self.db.lessons.delete_one({"id": lesson_id})
+        await catalog_cache.invalidate(self.db)
+        grader_cache.invalidate_lesson(lesson_id)
         return result.deleted_count > 0
     
     # Classroom Operations
@@ -129,74 +297,419 @@ class DatabaseService:
         )
         
         classroom_dict = classroom.dict()
+        if CLASSROOM_MEMBERSHIP == "dual":
+            classroom_dict["students"] = []
         await self.db.classrooms.insert_one(classroom_dict)
         return classroom
     
     async def get_classrooms_by_teacher(self, teacher_id: str) -> List[Classroom]:
-        cursor = self.db.classrooms.find({"teacherId": teacher_id})
+        cursor = self.db.classrooms.find({"teacherId": teacher_id}, CLASSROOM_PROJECTION)
         classrooms = []
         async for classroom_data in cursor:
             classrooms.append(Classroom(**classroom_data))
         return classrooms
     
+    async def get_student_classrooms(self, student_id: str) -> List[Classroom]:
+        cursor = self.db.enrollments.find({"studentId": student_id}, {"_id": 0, "classroomId": 1})
+        classroom_ids = [enrollment["classroomId"] async for enrollment in cursor]
+        if not classroom_ids:
+            return []
+        cursor = self.db.classrooms.find({"id": {"$in": classroom_ids}}, CLASSROOM_PROJECTION)
+        return [Classroom(**classroom_data) async for classroom_data in cursor]
+    
     async def get_classroom_by_id(self, classroom_id: str) -> Optional[Classroom]:
-        classroom_data = await self.db.classrooms.find_one({"id": classroom_id})
+        classroom_data = await self.db.classrooms.find_one({"id": classroom_id}, CLASSROOM_PROJECTION)
         if classroom_data:
             return Classroom(**classroom_data)
         return None
     
     async def get_classroom_by_invite_code(self, invite_code: str) -> Optional[Classroom]:
-        classroom_data = await self.db.classrooms.find_one({"inviteCode": invite_code})
+        classroom_data = await self.db.classrooms.find_one({"inviteCode": invite_code}, CLASSROOM_PROJECTION)
         if classroom_data:
             return Classroom(**classroom_data)
         return None
     
+    async def delete_classroom(self, classroom_id: str) -> bool:
+        result = await self.db.classrooms.delete_one({"id": classroom_id})
+        await self.db.enrollments.delete_many({"classroomId": classroom_id})
+        return result.deleted_count > 0
+    
+    async def is_enrolled(self, classroom_id: str, student_id: str) -> bool:
+        enrollment = await self.db.enrollments.find_one(
+            {"classroomId": classroom_id, "studentId": student_id},
+            {"_id": 1}
+        )
+        return enrollment is not None
+    
+    async def get_classroom_student_ids(self, classroom_id: str, skip: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Student ids in the order they joined."""
+        cursor = self.db.enrollments.find(
+            {"classroomId": classroom_id},
+            {"_id": 0, "studentId": 1}
+        ).sort([("enrolledAt", 1), ("_id", 1)]).skip(skip)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [enrollment["studentId"] async for enrollment in cursor]
+    
     async def join_classroom(self, classroom_id: str, student_id: str) -> bool:
-        result = await self.db.classrooms.update_one(
-            {"id": classroom_id, "students": {"$ne": student_id}},
-            {"$push": {"students": student_id}}
+        already = await self.enroll_students(classroom_id, [student_id])
+        return already is not None and not already
+    
+    async def enroll_students(self, classroom_id: str, student_ids: List[str]) -> Optional[List[str]]:
+        """Enroll students in a classroom, all or nothing.
+
+        Seats are reserved with one update whose filter checks studentCount
+        against maxStudents, so concurrent joins and imports can never
+        overfill a classroom; the enrollments are then inserted in one
+        batch. Returns the given students that were already enrolled, or
+        None if the classroom does not exist or the new students do not fit.
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        cursor = self.db.enrollments.find(
+            {"classroomId": classroom_id, "studentId": {"$in": student_ids}},
+            {"_id": 0, "studentId": 1}
         )
-        return result.modified_count > 0
+        already = {enrollment["studentId"] async for enrollment in cursor}
+        new_ids = [student_id for student_id in student_ids if student_id not in already]
+        if not new_ids:
+            exists = await self.db.classrooms.count_documents({"id": classroom_id}, limit=1)
+            return student_ids if exists else None
+        
+        update = {"$inc": {"studentCount": len(new_ids)}}
+        if CLASSROOM_MEMBERSHIP == "dual":
+            update["$addToSet"] = {"students": {"$each": new_ids}}
+        reserved = await self.db.classrooms.update_one(
+            {
+                "id": classroom_id,
+                "$expr": {"$lte": [{"$add": [{"$ifNull": ["$studentCount", 0]}, len(new_ids)]}, "$maxStudents"]}
+            },
+            update
+        )
+        if reserved.matched_count == 0:
+            return None
+        
+        enrolled_at = datetime.utcnow()
+        try:
+            await self.db.enrollments.insert_many(
+                [Enrollment(classroomId=classroom_id, studentId=student_id, enrolledAt=enrolled_at).dict()
+                 for student_id in new_ids],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            # A concurrent join enrolled some of them first; give their seats back
+            failed = [new_ids[error["index"]] for error in e.details["writeErrors"]]
+            await self.db.classrooms.update_one({"id": classroom_id}, {"$inc": {"studentCount": -len(failed)}})
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            already.update(failed)
+        
+        return [student_id for student_id in student_ids if student_id in already]
     
     async def leave_classroom(self, classroom_id: str, student_id: str) -> bool:
-        result = await self.db.classrooms.update_one(
-            {"id": classroom_id},
-            {"$pull": {"students": student_id}}
-        )
-        return result.modified_count > 0
+        result = await self.db.enrollments.delete_one({"classroomId": classroom_id, "studentId": student_id})
+        if result.deleted_count == 0:
+            return False
+        update = {"$inc": {"studentCount": -1}}
+        if CLASSROOM_MEMBERSHIP == "dual":
+            update["$pull"] = {"students": student_id}
+        await self.db.classrooms.update_one({"id": classroom_id}, update)
+        return True
     
     # Progress Operations
+    async def _upsert_progress(
+        self, user_id: str, lesson_id: str, fields: Progress, update: dict, session=None
+    ) -> Tuple[Progress, List[Achievement]]:
+        # Single atomic upsert on the unique (userId, lessonId) index.
+        # `fields` supplies the document for a fresh insert; keys already
+        # written by `update` are left to it.
+        owned = {"userId", "lessonId"} | {key for operator in update.values() for key in operator}
+        update = {**update, "$setOnInsert": fields.dict(exclude=owned)}
+        before, after = await self._write_progress({"userId": user_id, "lessonId": lesson_id}, update, session=session)
+        achievements = await self._update_rollup(before, after, session=session)
+        return Progress(**after), achievements
+    
+    async def _write_progress(
+        self, query: Dict[str, str], update: dict, session=None
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        # Upsert one progress document and return its pre- and post-image.
+        # The pre-image is read atomically with the write, so rollup deltas
+        # derived from it never double count a concurrent writer's change
+        for _ in range(2):
+            try:
+                before = await self.db.progress.find_one_and_update(
+                    query,
+                    update,
+                    upsert=True,
+                    projection={"_id": 0},
+                    return_document=ReturnDocument.BEFORE,
+                    session=session
+                )
+                return before, apply_update(before, update, query)
+            except DuplicateKeyError:
+                # Lost an insert race with a concurrent upsert; now it matches.
+                # A transaction is aborted by the error, so it is retried as a whole
+                if session is not None:
+                    raise
+                continue
+        raise RuntimeError(f"Could not upsert progress for lesson {query['lessonId']}")
+    
     async def create_or_update_progress(self, user_id: str, progress_create: ProgressCreate) -> Progress:
-        # Check if progress already exists
-        existing = await self.db.progress.find_one({
-            "userId": user_id,
-            "lessonId": progress_create.lessonId
-        })
-        
-        if existing:
-            progress = Progress(**existing)
-            progress.attempts += 1
-            await self.db.progress.update_one(
-                {"id": progress.id},
-                {"$set": progress.dict()}
-            )
-        else:
-            progress = Progress(userId=user_id, **progress_create.dict())
-            await self.db.progress.insert_one(progress.dict())
-        
+        # Every call counts as an attempt, including the first
+        progress, _ = await self._upsert_progress(
+            user_id,
+            progress_create.lessonId,
+            Progress(userId=user_id, **progress_create.dict()),
+            {"$inc": {"attempts": 1}}
+        )
         return progress
     
+    async def complete_lesson(
+        self, user_id: str, lesson_id: str, course_id: str, score: int, session=None, job_id: Optional[str] = None
+    ) -> Tuple[Progress, List[Achievement]]:
+        # Mark completed, keep the best score and count the attempt.
+        # Also returns the achievements the completion unlocked.
+        update = {
+            "$set": {"status": ProgressStatus.COMPLETED, "completedAt": datetime.utcnow()},
+            "$max": {"score": score},
+            "$inc": {"attempts": 1}
+        }
+        # With a job id the progress write records it in commitJobIds and,
+        # once the rollups and achievements are applied, in rollupJobIds.
+        # Inside a transaction both land together with the progress write
+        query = {"userId": user_id, "lessonId": lesson_id}
+        if job_id:
+            existing = await self.db.progress.find_one({**query, "commitJobIds": job_id}, {"_id": 0}, session=session)
+            if existing:
+                if job_id in existing.get("rollupJobIds", []):
+                    # This job's completion is already recorded
+                    return Progress(**existing), []
+                # A previous run stopped after the progress write; the delta it
+                # was going to apply is lost, so recompute the user's rollups
+                # and award whatever the counters now unlock
+                await rebuild_rollups(self.db, user_id)
+                achievements = await self.recheck_achievements(user_id)
+                await self._push_job_id(query, "rollupJobIds", job_id, session=session)
+                return Progress(**existing), achievements
+            update["$push"] = {"commitJobIds": {"$each": [job_id], "$slice": -COMMIT_JOB_IDS_KEPT}}
+            if session is not None:
+                update["$push"]["rollupJobIds"] = {"$each": [job_id], "$slice": -COMMIT_JOB_IDS_KEPT}
+        progress, achievements = await self._upsert_progress(
+            user_id,
+            lesson_id,
+            Progress(userId=user_id, lessonId=lesson_id, courseId=course_id),
+            update,
+            session=session
+        )
+        if job_id and session is None:
+            await self._push_job_id(query, "rollupJobIds", job_id)
+        return progress, achievements
+    
+    async def _push_job_id(self, query: Dict[str, str], field: str, job_id: str, session=None):
+        await self.db.progress.update_one(
+            query, {"$push": {field: {"$each": [job_id], "$slice": -COMMIT_JOB_IDS_KEPT}}}, session=session
+        )
+    
+    async def apply_progress_events(
+        self,
+        user_id: str,
+        events: List[ProgressEvent],
+        course_ids: Dict[str, str]
+    ) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        """Apply progress events, one atomic upsert per lesson.
+        
+        Each event acts like POST /progress/ followed by PUT /progress/{id}.
+        Events for the same lesson are folded in order into one upsert, so
+        the result does not depend on the order the server applies them in.
+        The upserts run concurrently and the rollups are updated once for
+        the whole batch. Returns lessonId -> (progressId, error).
+        """
+        now = datetime.utcnow()
+        folded: Dict[str, Dict[str, Any]] = {}
+        for event in events:
+            entry = folded.setdefault(event.lessonId, {"set": {}, "attempts": 0, "classroomId": event.classroomId})
+            entry["attempts"] += 1
+            entry["set"].update(event.dict(include={"status", "score", "timeSpent"}, exclude_none=True))
+            if event.status == ProgressStatus.COMPLETED:
+                entry["set"]["completedAt"] = now
+        
+        coding_lesson_ids = set(await self.get_coding_lesson_ids())
+        writes = asyncio.Semaphore(PROGRESS_WRITE_CONCURRENCY)
+        
+        async def write(lesson_id: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+            entry = folded[lesson_id]
+            fresh = Progress(userId=user_id, lessonId=lesson_id, courseId=course_ids[lesson_id], classroomId=entry["classroomId"])
+            update = {
+                "$setOnInsert": fresh.dict(exclude={"userId", "lessonId", "attempts", *entry["set"]}),
+                "$inc": {"attempts": entry["attempts"]}
+            }
+            if entry["set"]:
+                update["$set"] = entry["set"]
+            async with writes:
+                return await self._write_progress({"userId": user_id, "lessonId": lesson_id}, update)
+        
+        lesson_ids = list(folded)
+        outcomes = await asyncio.gather(*[write(lesson_id) for lesson_id in lesson_ids], return_exceptions=True)
+        
+        results: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        rollup_deltas: Dict[str, Dict[str, int]] = {}
+        for lesson_id, outcome in zip(lesson_ids, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, (PyMongoError, RuntimeError)):
+                    raise outcome
+                results[lesson_id] = (None, str(outcome) or "Write failed")
+                continue
+            before, after = outcome
+            results[lesson_id] = (after["id"], None)
+            course_delta = rollup_deltas.setdefault(after["courseId"], {})
+            for key, value in rollup_delta(before, after, lesson_id in coding_lesson_ids).items():
+                course_delta[key] = course_delta.get(key, 0) + value
+        await self._update_rollups(user_id, rollup_deltas)
+        return results
+    
     async def update_progress(self, progress_id: str, progress_update: ProgressUpdate) -> bool:
         update_data = {k: v for k, v in progress_update.dict().items() if v is not None}
         
         if progress_update.status == ProgressStatus.COMPLETED:
             update_data["completedAt"] = datetime.utcnow()
         
-        result = await self.db.progress.update_one(
+        update = {"$set": update_data}
+        before = await self.db.progress.find_one_and_update(
             {"id": progress_id},
-            {"$set": update_data}
+            update,
+            projection={"_id": 0},
+            return_document=ReturnDocument.BEFORE
         )
-        return result.modified_count > 0
+        if before is None:
+            return False
+        await self._update_rollup(before, apply_update(before, update, {}))
+        return True
+    
+    # Progress rollups: per-(user, course) and per-user counters maintained
+    # from the pre- and post-image of every progress write. They also feed
+    # the achievement rules. rebuild_rollups in progress_rollups.py
+    # recomputes them from scratch.
+    async def _update_rollup(self, before: Optional[Dict[str, Any]], after: Dict[str, Any], session=None) -> List[Achievement]:
+        coding = after["lessonId"] in await self.get_coding_lesson_ids()
+        return await self._update_rollups(
+            after["userId"], {after["courseId"]: rollup_delta(before, after, coding)}, session=session
+        )
+    
+    async def _inc_counters(self, collection, query: Dict[str, str], delta: Dict[str, int], now: datetime, session=None) -> Dict[str, Any]:
+        update = {"$max": {"lastActivity": now}}
+        if delta:
+            update["$inc"] = delta
+        for _ in range(2):
+            try:
+                return await collection.find_one_and_update(
+                    query,
+                    update,
+                    upsert=True,
+                    projection={"_id": 0},
+                    return_document=ReturnDocument.AFTER,
+                    session=session
+                )
+            except DuplicateKeyError:
+                # First write for this key raced another one; now it matches.
+                # Inside a transaction the caller retries the whole transaction
+                if session is not None:
+                    raise
+                continue
+        raise RuntimeError(f"Could not update counters for {query}")
+    
+    async def _update_rollups(self, user_id: str, deltas: Dict[str, Dict[str, int]], session=None) -> List[Achievement]:
+        """Apply per-course counter deltas and award what they unlock.
+        
+        Rules only see the counters just before and after this write, so
+        the cost is the same however long the user's history is.
+        """
+        if not deltas:
+            return []
+        now = datetime.utcnow()
+        total_delta = sum_deltas(deltas.values())
+        totals = await self._inc_counters(self.db.progress_totals, {"userId": user_id}, total_delta, now, session=session)
+        
+        completed_courses = []
+        for course_id, delta in deltas.items():
+            rollup = await self._inc_counters(
+                self.db.progress_rollups, {"userId": user_id, "courseId": course_id}, delta, now, session=session
+            )
+            if delta.get("completed", 0) > 0:
+                completed_courses.append((course_id, rollup["completed"] - delta["completed"], rollup["completed"]))
+        if not completed_courses:
+            return []
+        
+        counters = {
+            counter: (totals.get(counter, 0) - total_delta.get(counter, 0), totals.get(counter, 0))
+            for counter in ("completed", "codingCompleted")
+        }
+        lesson_counts = await self.get_lesson_counts_by_course()
+        courses = []
+        for course_id, before, after in completed_courses:
+            course = await self.get_course_by_id(course_id)
+            if course:
+                courses.append((course, before, after, lesson_counts.get(course_id, 0)))
+        return await self.award_achievements(user_id, evaluate_achievements(user_id, counters, courses), session=session)
+    
+    async def get_progress_rollups(self, user_id: str, session=None) -> List[ProgressRollup]:
+        cursor = self.db.progress_rollups.find({"userId": user_id}, {"_id": 0}, session=session)
+        return [ProgressRollup(**rollup_data) async for rollup_data in cursor]
+    
+    async def _supports_transactions(self) -> bool:
+        cls = type(self)
+        if cls._transactions_supported is None:
+            if MONGO_TRANSACTIONS in ("on", "off"):
+                cls._transactions_supported = MONGO_TRANSACTIONS == "on"
+            else:
+                try:
+                    hello = await self.db.client.admin.command("hello")
+                    cls._transactions_supported = "setName" in hello or hello.get("msg") == "isdbgrid"
+                except Exception:
+                    cls._transactions_supported = False
+        return cls._transactions_supported
+    
+    async def commit_submission(
+        self, user_id: str, lesson_id: str, course_id: str, score: int, job_id: Optional[str] = None
+    ) -> List[Achievement]:
+        """Record a passing code submission: complete the lesson and award
+        the score plus any achievements it unlocks as XP.
+        
+        Runs in one transaction on replica sets and sharded clusters. On a
+        standalone server it falls back to one write per collection. With a
+        job id a commit that failed part-way can be run again: the progress
+        write and the XP are applied once per job, and a retry that finds
+        the progress written but not its rollups recomputes the user's
+        rollups and re-evaluates the achievement rules.
+        """
+        started = time.perf_counter()
+        
+        async def write(session=None) -> List[Achievement]:
+            # Achievements unlocked by the completion are awarded (with their
+            # XP) inside the same transaction
+            _, achievements = await self.complete_lesson(user_id, lesson_id, course_id, score, session=session, job_id=job_id)
+            await self.add_user_xp(user_id, score, session=session, job_id=job_id)
+            return achievements
+        
+        if await self._supports_transactions():
+            for attempt in range(2):
+                try:
+                    async with await self.db.client.start_session() as session:
+                        achievements = await session.with_transaction(write)
+                    break
+                except DuplicateKeyError:
+                    # An upsert lost an insert race with a concurrent writer,
+                    # which aborts the transaction without a retryable label.
+                    # Run it again; the upsert now matches the winner's document
+                    if attempt:
+                        raise
+            commit_counts["transaction"] += 1
+        else:
+            achievements = await write()
+            commit_counts["sequential"] += 1
+        
+        # Readers may have cached the user between the write and the commit
+        user_cache.invalidate_user(user_id)
+        commit_latency.record(time.perf_counter() - started)
+        return achievements
     
     async def get_user_progress(self, user_id: str) -> List[Progress]:
         cursor = self.db.progress.find({"userId": user_id})
@@ -205,6 +718,17 @@ class DatabaseService:
             progress_list.append(Progress(**progress_data))
         return progress_list
     
+    async def get_user_progress_stats(self, user_id: str) -> Dict[str, Dict[str, int]]:
+        # Per-course progress counts for one user, read from the rollups
+        return {
+            rollup.courseId: {"total": rollup.lessons, "completed": rollup.completed}
+            for rollup in await self.get_progress_rollups(user_id)
+        }
+    
+    async def get_progress_totals(self, user_id: str) -> ProgressTotals:
+        totals_data = await self.db.progress_totals.find_one({"userId": user_id}, {"_id": 0})
+        return ProgressTotals(**totals_data) if totals_data else ProgressTotals(userId=user_id)
+    
     async def get_course_progress(self, user_id: str, course_id: str) -> List[Progress]:
         cursor = self.db.progress.find({"userId": user_id, "courseId": course_id})
         progress_list = []
@@ -244,17 +768,60 @@ class DatabaseService:
         return result
     
     # Achievement Operations
-    async def create_achievement(self, achievement: Achievement) -> Achievement:
-        achievement_dict = achievement.dict()
-        await self.db.achievements.insert_one(achievement_dict)
-        
-        # Update user XP
-        await self.db.users.update_one(
-            {"id": achievement.userId},
-            {"$inc": {"profile.totalXP": achievement.points}}
-        )
+    async def award_achievement(self, achievement: Achievement, session=None) -> Tuple[Achievement, bool]:
+        """Insert the achievement unless the user already has one of its type.
+        
+        A single upsert on the unique (userId, type) index, so concurrent
+        awards cannot both succeed. XP is credited only when inserted.
+        Returns the stored achievement and whether it was just awarded.
+        """
+        try:
+            existing = await self.db.achievements.find_one_and_update(
+                {"userId": achievement.userId, "type": achievement.type},
+                {"$setOnInsert": achievement.dict(exclude={"userId", "type"})},
+                upsert=True,
+                projection={"_id": 0},
+                return_document=ReturnDocument.BEFORE,
+                session=session
+            )
+        except DuplicateKeyError:
+            # Both upserts tried to insert; the other one won. Inside a
+            # transaction the caller retries the whole transaction
+            if session is not None:
+                raise
+            existing = await self.db.achievements.find_one(
+                {"userId": achievement.userId, "type": achievement.type}, {"_id": 0}, session=session
+            )
+        if existing is not None:
+            return Achievement(**existing), False
         
-        return achievement
+        await self.add_user_xp(achievement.userId, achievement.points, session=session)
+        return achievement, True
+    
+    async def award_achievements(self, user_id: str, achievements: List[Achievement], session=None) -> List[Achievement]:
+        # Returns the newly awarded ones; existing awards are left untouched
+        awarded = []
+        for achievement in achievements:
+            stored, created = await self.award_achievement(achievement, session=session)
+            if created:
+                awarded.append(stored)
+        return awarded
+    
+    async def recheck_achievements(self, user_id: str) -> List[Achievement]:
+        # Evaluate every rule against the current counters, e.g. after the
+        # rules changed or rollups were rebuilt
+        totals, rollups, lesson_counts = await asyncio.gather(
+            self.get_progress_totals(user_id),
+            self.get_progress_rollups(user_id),
+            self.get_lesson_counts_by_course()
+        )
+        counters = {"completed": (0, totals.completed), "codingCompleted": (0, totals.codingCompleted)}
+        courses = []
+        for rollup in rollups:
+            course = await self.get_course_by_id(rollup.courseId) if rollup.completed else None
+            if course:
+                courses.append((course, 0, rollup.completed, lesson_counts.get(rollup.courseId, 0)))
+        return await self.award_achievements(user_id, evaluate_achievements(user_id, counters, courses))
     
     async def get_user_achievements(self, user_id: str) -> List[Achievement]:
         cursor = self.db.achievements.find({"userId": user_id}).sort("earnedAt", -1)
@@ -263,36 +830,133 @@ class DatabaseService:
             achievements.append(Achievement(**achievement_data))
         return achievements
     
+    async def count_user_achievements(self, user_id: str) -> int:
+        return await self.db.achievements.count_documents({"userId": user_id})
+    
+    async def get_recent_achievements(self, user_id: str, limit: int = 3) -> List[Achievement]:
+        cursor = self.db.achievements.find({"userId": user_id}).sort("earnedAt", -1).limit(limit)
+        achievements = []
+        async for achievement_data in cursor:
+            achievements.append(Achievement(**achievement_data))
+        return achievements
+    
+    async def get_progress_dashboard_data(self, user_id: str) -> Dict[str, Any]:
+        # Fixed number of queries regardless of how many courses exist
+        courses, lesson_counts, progress_stats, recent_achievements = await asyncio.gather(
+            self.get_course_summaries(),
+            self.get_lesson_counts_by_course(),
+            self.get_user_progress_stats(user_id),
+            self.get_recent_achievements(user_id, limit=3)
+        )
+        return {
+            "courses": courses,
+            "lessonCounts": lesson_counts,
+            "progressStats": progress_stats,
+            "recentAchievements": recent_achievements
+        }
+    
     # Analytics Operations
+    async def get_admin_dashboard_stats(self) -> Dict[str, Any]:
+        """Platform-wide counters for the admin dashboard.
+
+        Collection totals come from the collection metadata; role and
+        activity counts and the recent lists are answered from indexes.
+        """
+        week_ago = datetime.utcnow() - timedelta(days=7)
+        (
+            total_users, total_students, total_teachers, total_courses,
+            total_lessons, total_classrooms, active_users, recent_users, recent_courses
+        ) = await asyncio.gather(
+            self.db.users.estimated_document_count(),
+            self.db.users.count_documents({"role": UserRole.STUDENT.value}),
+            self.db.users.count_documents({"role": UserRole.TEACHER.value}),
+            self.db.courses.estimated_document_count(),
+            self.db.lessons.estimated_document_count(),
+            self.db.classrooms.estimated_document_count(),
+            self.db.users.count_documents({"profile.lastActiveDate": {"$gte": week_ago}}),
+            self.db.users.find({}, {"_id": 0, "name": 1, "createdAt": 1}).sort("createdAt", -1).limit(3).to_list(3),
+            self.db.courses.find({}, {"_id": 0, "title": 1, "updatedAt": 1}).sort("updatedAt", -1).limit(2).to_list(2)
+        )
+        return {
+            "totalUsers": total_users,
+            "totalStudents": total_students,
+            "totalTeachers": total_teachers,
+            "totalCourses": total_courses,
+            "totalLessons": total_lessons,
+            "totalClassrooms": total_classrooms,
+            "activeUsers": active_users,
+            "recentUsers": recent_users,
+            "recentCourses": recent_courses
+        }
+    
+    async def get_course_lesson_stats(self, course_id: str) -> Tuple[int, Dict[str, Dict[str, Any]]]:
+        """Distinct students and per-lesson progress counters for one course.
+
+        Both aggregations stream the course's progress through the courseId
+        index and keep one small document per lesson or per student, so
+        memory does not grow with the number of progress documents.
+        """
+        is_completed = {"$eq": ["$status", ProgressStatus.COMPLETED.value]}
+        lesson_pipeline = [
+            {"$match": {"courseId": course_id}},
+            {"$group": {
+                "_id": "$lessonId",
+                "attempts": {"$sum": 1},
+                "completions": {"$sum": {"$cond": [is_completed, 1, 0]}},
+                "completedScore": {"$sum": {"$cond": [is_completed, {"$ifNull": ["$score", 0]}, 0]}}
+            }}
+        ]
+        student_pipeline = [
+            {"$match": {"courseId": course_id}},
+            {"$group": {"_id": "$userId"}},
+            {"$count": "students"}
+        ]
+        lesson_rows, student_rows = await asyncio.gather(
+            self.db.progress.aggregate(lesson_pipeline, allowDiskUse=True).to_list(None),
+            self.db.progress.aggregate(student_pipeline, allowDiskUse=True).to_list(None)
+        )
+        total_students = student_rows[0]["students"] if student_rows else 0
+        return total_students, {row.pop("_id"): row for row in lesson_rows}
+    
     async def get_course_analytics(self) -> List[CourseAnalytics]:
-        pipeline = [
-            {"$lookup": {
-                "from": "progress",
-                "localField": "id",
-                "foreignField": "courseId",
-                "as": "progress"
-            }},
-            {"$project": {
-                "courseId": "$id",
-                "courseName": "$title",
-                "totalLessons": {"$size": "$lessons"},
-                "totalStudents": {"$size": {"$setUnion": ["$progress.userId"]}},
-                "completedProgress": {"$size": {"$filter": {
-                    "input": "$progress",
-                    "cond": {"$eq": ["$$this.status", "completed"]}
-                }}},
-                "totalProgress": {"$size": "$progress"}
+        """Students and completion rate of every course.
+
+        Progress is grouped from the progress side: first one row per
+        (course, student), then one per course, so no stage ever holds a
+        course's whole progress list and large groups can spill to disk.
+        """
+        is_completed = {"$eq": ["$status", ProgressStatus.COMPLETED.value]}
+        progress_pipeline = [
+            {"$group": {
+                "_id": {"courseId": "$courseId", "userId": "$userId"},
+                "total": {"$sum": 1},
+                "completed": {"$sum": {"$cond": [is_completed, 1, 0]}}
             }},
-            {"$addFields": {
-                "averageCompletion": {"$cond": [
-                    {"$eq": ["$totalProgress", 0]},
-                    0,
-                    {"$multiply": [{"$divide": ["$completedProgress", "$totalProgress"]}, 100]}
-                ]}
+            {"$group": {
+                "_id": "$_id.courseId",
+                "students": {"$sum": 1},
+                "totalProgress": {"$sum": "$total"},
+                "completedProgress": {"$sum": "$completed"}
             }}
         ]
+        course_pipeline = [
+            {"$project": {"_id": 0, "id": 1, "title": 1, "totalLessons": {"$size": {"$ifNull": ["$lessons", []]}}}}
+        ]
+        progress_rows, courses = await asyncio.gather(
+            self.db.progress.aggregate(progress_pipeline, allowDiskUse=True).to_list(None),
+            self.db.courses.aggregate(course_pipeline).to_list(None)
+        )
+        progress_by_course = {row["_id"]: row for row in progress_rows}
         
         analytics = []
-        async for doc in self.db.courses.aggregate(pipeline):
-            analytics.append(CourseAnalytics(**doc))
+        for course in courses:
+            stats = progress_by_course.get(course["id"])
+            total_progress = stats["totalProgress"] if stats else 0
+            analytics.append(CourseAnalytics(
+                courseId=course["id"],
+                courseName=course["title"],
+                totalLessons=course["totalLessons"],
+                totalStudents=stats["students"] if stats else 0,
+                averageCompletion=round(stats["completedProgress"] / total_progress * 100) if total_progress else 0
+            ))
         return analytics
\ No newline at end of file
@@ -4,7 +4,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from auth import AuthService
 from database import DatabaseService
-from models import User, UserRole
+from models import User, UserRole, TokenData
 
 # Security scheme
 security = HTTPBearer()
@@ -38,6 +38,30 @@ async def get_current_user(
     
     return user
 
+# Token claims without a user fetch when the token carries them (JWT_CLAIMS_MODE)
+async def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service)
+) -> TokenData:
+    claims = await auth_service.get_token_claims(credentials.credentials)
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
+
+async def get_user_for_claims(claims: TokenData, auth_service: AuthService) -> User:
+    user = await auth_service.get_user_by_subject(claims.email)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
 # Role-based access control
 def require_role(required_role: UserRole):
     def role_checker(current_user: User = Depends(get_current_user)):
@@ -49,18 +73,25 @@ def require_role(required_role: UserRole):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role != UserRole.ADMIN:
+async def require_admin(
+    claims: TokenData = Depends(get_token_claims),
+    auth_service: AuthService = Depends(get_auth_service)
+) -> User:
+    # Reject from the token claims before loading the user document
+    if claims.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required"
         )
-    return current_user
+    return await get_user_for_claims(claims, auth_service)
 
-def require_teacher_or_admin(current_user: User = Depends(get_current_user)):
-    if current_user.role not in [UserRole.TEACHER, UserRole.ADMIN]:
+async def require_teacher_or_admin(
+    claims: TokenData = Depends(get_token_claims),
+    auth_service: AuthService = Depends(get_auth_service)
+) -> User:
+    if claims.role not in [UserRole.TEACHER, UserRole.ADMIN]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Teacher or admin access required"
         )
-    return current_user
\ No newline at end of file
+    return await get_user_for_claims(claims, auth_service)
\ No newline at end of file
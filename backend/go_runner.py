@@ -0,0 +1,589 @@
+# Sandboxed Go submission runner
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from models import CodingChallenge, CodeSubmissionResult, TestCase, TestCaseResult
+from metrics import LatencyRecorder
+from grader_cache import grader_cache, source_hash, exact_source_hash, challenge_hash
+import asyncio
+import logging
+import os
+import shutil
+import signal
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+GO_BINARY = os.getenv("GO_BINARY") or shutil.which("go") or "/usr/local/go/bin/go"
+GRADER_WORKERS = int(os.getenv("GRADER_WORKERS", str(os.cpu_count() or 1)))
+# Shared by every grading process on the host for the Go build cache; each
+# process compiles and runs in its own directory below it
+GRADER_WORKDIR = Path(os.getenv("GRADER_WORKDIR", os.path.join(tempfile.gettempdir(), "go-academy-grader")))
+GRADER_COMPILE_TIMEOUT_SECONDS = float(os.getenv("GRADER_COMPILE_TIMEOUT_SECONDS", "60"))
+GRADER_RUN_TIMEOUT_SECONDS = float(os.getenv("GRADER_RUN_TIMEOUT_SECONDS", "2"))
+GRADER_MEMORY_LIMIT_MB = int(os.getenv("GRADER_MEMORY_LIMIT_MB", "512"))
+GRADER_OUTPUT_LIMIT_BYTES = int(os.getenv("GRADER_OUTPUT_LIMIT_BYTES", str(64 * 1024)))
+# Submissions run in fresh mount/network/ipc/pid namespaces, chrooted to a
+# directory holding only the binary, as a dedicated unprivileged uid. The
+# grader refuses to start when that is not possible; "off" runs them as the
+# API user with full filesystem access and is for local development only
+GRADER_UNSHARE = os.getenv("GRADER_UNSHARE", "on").lower()
+# Run slot i runs submissions as uid/gid GRADER_SANDBOX_UID + i
+GRADER_SANDBOX_UID = int(os.getenv("GRADER_SANDBOX_UID", "60000"))
+# Threads and processes per sandbox uid (RLIMIT_NPROC)
+GRADER_PROCESS_LIMIT = int(os.getenv("GRADER_PROCESS_LIMIT", "64"))
+# Test-case processes running at once, across all submissions
+GRADER_RUN_CONCURRENCY = int(os.getenv("GRADER_RUN_CONCURRENCY", str(os.cpu_count() or 1)))
+# Cancel a submission's remaining test cases after its first failure
+GRADER_FAIL_FAST = os.getenv("GRADER_FAIL_FAST", "false").lower() in ("1", "true", "yes")
+
+GO_MOD = "module sandbox\n\ngo 1.21\n"
+# Runtime errors shown to the student are cut to this length
+ERROR_LIMIT_CHARS = 2000
+# Depends on machine load, so verdicts carrying it are never cached
+TIME_LIMIT_ERROR = "Time limit exceeded"
+# The Go runtime reports hitting GRADER_MEMORY_LIMIT_MB either way, depending
+# on which allocation failed
+OUT_OF_MEMORY_MARKERS = ("fatal error: out of memory", "runtime: out of memory")
+# Error of the cases that never ran (fail-fast, or after a batch crash)
+NOT_RUN_ERROR = "Not run"
+# Batch mode: stdin is the case count on the first line followed by every
+# input; the program prints this line after the answer to each case
+BATCH_SEPARATOR = "---"
+
+# Compiled once per workspace at startup so the shared build cache already
+# holds the standard packages lessons use
+WARMUP_SOURCE = """package main
+
+import (
+\t"bufio"
+\t"errors"
+\t"fmt"
+\t"math"
+\t"os"
+\t"sort"
+\t"strconv"
+\t"strings"
+\t"sync"
+\t"time"
+\t"unicode"
+)
+
+func main() {
+\t_ = bufio.NewReader(os.Stdin)
+\t_ = errors.New("")
+\t_ = math.Sqrt(2)
+\t_ = sort.Ints
+\t_ = strconv.Itoa(1)
+\t_ = strings.TrimSpace(" ")
+\t_ = sync.Mutex{}
+\t_ = time.Now()
+\t_ = unicode.IsDigit('1')
+\tfmt.Println("ok")
+}
+"""
+
+class ProcessResult:
+    def __init__(self, returncode: Optional[int], stdout: str, stderr: str, timed_out: bool, output_exceeded: bool, elapsed: float):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.output_exceeded = output_exceeded
+        self.elapsed = elapsed
+
+def _normalize_output(output: str) -> str:
+    lines = output.replace("\r\n", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+async def _read_limited(stream: asyncio.StreamReader, limit: int, on_overflow) -> bytes:
+    data = bytearray()
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            break
+        if len(data) + len(chunk) > limit:
+            data.extend(chunk[:limit - len(data)])
+            on_overflow()
+            break
+        data.extend(chunk)
+    return bytes(data)
+
+def _kill_group(pid: int):
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+async def _reap_spawn(spawn: asyncio.Future):
+    # The caller was cancelled while the process was being started: wait for
+    # the start to finish, then kill the whole group. Killing only the direct
+    # child (asyncio's own cleanup) leaves the sandboxed program, which no
+    # longer gets a parent-death signal once it has switched uid, running
+    # with the pipes open
+    try:
+        proc = await spawn
+    except Exception:
+        return
+    _kill_group(proc.pid)
+    await proc.wait()
+
+async def run_process(
+    argv: List[str],
+    stdin: str = "",
+    cwd: Optional[Path] = None,
+    env: Optional[dict] = None,
+    timeout: float = GRADER_RUN_TIMEOUT_SECONDS,
+    output_limit: int = GRADER_OUTPUT_LIMIT_BYTES
+) -> ProcessResult:
+    """Run a process without blocking the event loop, enforcing a wall-clock
+    timeout and an output cap. The whole process group is killed on either."""
+    started = time.perf_counter()
+    spawn = asyncio.ensure_future(asyncio.create_subprocess_exec(
+        *argv,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(cwd) if cwd else None,
+        env=env,
+        start_new_session=True
+    ))
+    try:
+        proc = await asyncio.shield(spawn)
+    except asyncio.CancelledError:
+        await _reap_spawn(spawn)
+        raise
+    exceeded = False
+
+    def overflow():
+        nonlocal exceeded
+        exceeded = True
+        _kill_group(proc.pid)
+
+    async def feed():
+        try:
+            if stdin:
+                proc.stdin.write(stdin.encode())
+                await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            proc.stdin.close()
+
+    io = asyncio.gather(
+        feed(),
+        _read_limited(proc.stdout, output_limit, overflow),
+        _read_limited(proc.stderr, output_limit, overflow),
+        proc.wait()
+    )
+    # Retrieve the outcome when the caller is cancelled mid-run (fail-fast)
+    io.add_done_callback(lambda future: future.cancelled() or future.exception())
+    timed_out = False
+    try:
+        _, stdout, stderr, _ = await asyncio.wait_for(io, timeout=timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        stdout, stderr = b"", b""
+    finally:
+        if proc.returncode is None:
+            _kill_group(proc.pid)
+            await proc.wait()
+
+    return ProcessResult(
+        returncode=proc.returncode,
+        stdout=stdout.decode(errors="replace"),
+        stderr=stderr.decode(errors="replace"),
+        timed_out=timed_out,
+        output_exceeded=exceeded,
+        elapsed=time.perf_counter() - started
+    )
+
+class Workspace:
+    def __init__(self, path: Path):
+        self.path = path
+        self.source = path / "main.go"
+        # The sandbox root: read-only for the sandbox uids, holds only the
+        # statically linked binary
+        self.jail = path / "jail"
+        self.binary = self.jail / "prog"
+
+class GoRunner:
+    """Compiles and runs Go submissions on a bounded pool of pre-warmed
+    workspaces. Each workspace handles one submission at a time."""
+
+    def __init__(
+        self,
+        workers: int = GRADER_WORKERS,
+        workdir: Path = GRADER_WORKDIR,
+        run_concurrency: int = GRADER_RUN_CONCURRENCY,
+        fail_fast: bool = GRADER_FAIL_FAST
+    ):
+        self.workers = workers
+        self.workdir = workdir
+        # The Go build cache is safe to share between processes
+        self.gocache = workdir / "gocache"
+        self.process_dir: Optional[Path] = None
+        self.run_concurrency = run_concurrency
+        self.fail_fast = fail_fast
+        self._pool: Optional[asyncio.Queue] = None
+        self._run_slots: Optional[asyncio.Queue] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._prlimit: Optional[str] = None
+        self._unshare: Optional[str] = None
+        self.waiting = 0
+        self.compile_latency = LatencyRecorder()
+        self.grade_latency = LatencyRecorder()
+
+    @property
+    def available(self) -> bool:
+        return bool(GO_BINARY) and os.path.exists(GO_BINARY)
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._pool is not None:
+                return
+            if not self.available:
+                raise RuntimeError(f"Go toolchain not found at {GO_BINARY}")
+
+            self._detect_sandbox()
+            self.workdir.mkdir(parents=True, exist_ok=True)
+            _remove_stale_process_dirs(self.workdir)
+            if self.process_dir is None:
+                self.process_dir = Path(tempfile.mkdtemp(prefix=f"proc-{os.getpid()}-", dir=self.workdir))
+            self._run_slots = asyncio.Queue()
+            for slot in range(self.run_concurrency):
+                self._run_slots.put_nowait(GRADER_SANDBOX_UID + slot)
+            pool = asyncio.Queue()
+            for index in range(self.workers):
+                workspace = Workspace(self.process_dir / f"worker-{index}")
+                workspace.jail.mkdir(parents=True, exist_ok=True)
+                workspace.jail.chmod(0o755)
+                (workspace.path / "go.mod").write_text(GO_MOD)
+                pool.put_nowait(workspace)
+
+            # Warm the shared build cache once; the first build compiles the
+            # standard library packages, later builds only the submission.
+            # Running the result proves the sandbox works before any
+            # submission is accepted
+            warmup = await pool.get()
+            result = await self._compile(warmup, WARMUP_SOURCE)
+            if result.returncode != 0:
+                raise RuntimeError(f"Go runner warm-up build failed: {result.stderr.strip()}")
+            probe = await self._run_binary(warmup, "", timeout=5)
+            if probe.returncode != 0 or probe.stdout.strip() != "ok":
+                raise RuntimeError(f"Go runner sandbox is not usable: {probe.stderr.strip() or probe.returncode}")
+            pool.put_nowait(warmup)
+            self._pool = pool
+            logger.info("Go runner ready: %d workers, sandbox=%s", self.workers, self._sandbox_description())
+
+    def _detect_sandbox(self):
+        if GRADER_UNSHARE == "off":
+            logger.warning("GRADER_UNSHARE=off - submissions run unsandboxed as the API user; local development only")
+            return
+        self._prlimit = shutil.which("prlimit")
+        self._unshare = shutil.which("unshare")
+        if not self._prlimit or not self._unshare:
+            raise RuntimeError("prlimit and unshare (util-linux) are required to sandbox submissions")
+        if os.geteuid() != 0:
+            # Switching to the sandbox uids and building the namespaces
+            # without a user namespace needs root
+            raise RuntimeError("The submission sandbox needs root; set GRADER_UNSHARE=off for local development only")
+
+    def _sandbox_prefix(self, workspace: Workspace, timeout: float, uid: int) -> List[str]:
+        if GRADER_UNSHARE == "off":
+            return []
+        memory = GRADER_MEMORY_LIMIT_MB * 1024 * 1024
+        cpu = max(1, int(timeout + 1))
+        # RLIMIT_DATA rather than RLIMIT_AS: the Go runtime reserves far
+        # more address space than it ever commits. RLIMIT_NPROC only binds
+        # once unshare has switched to the sandbox uid
+        return [
+            self._prlimit, f"--data={memory}", f"--cpu={cpu}", "--nofile=64",
+            f"--fsize={GRADER_OUTPUT_LIMIT_BYTES}", "--core=0", f"--nproc={GRADER_PROCESS_LIMIT}", "--",
+            self._unshare, "--mount", "--net", "--ipc", "--pid", "--uts", "--fork", "--kill-child",
+            f"--root={workspace.jail}", "--wd=/", f"--setgid={uid}", f"--setuid={uid}", "--"
+        ]
+
+    def _sandbox_description(self) -> str:
+        if GRADER_UNSHARE == "off":
+            return "none"
+        return f"prlimit+unshare(mount,net,ipc,pid,uts)+chroot, uids {GRADER_SANDBOX_UID}-{GRADER_SANDBOX_UID + self.run_concurrency - 1}"
+
+    @asynccontextmanager
+    async def _workspace(self):
+        await self.start()
+        self.waiting += 1
+        try:
+            workspace = await self._pool.get()
+        finally:
+            self.waiting -= 1
+        try:
+            yield workspace
+        finally:
+            self._pool.put_nowait(workspace)
+
+    def _build_env(self, workspace: Workspace) -> dict:
+        return {
+            "PATH": os.path.dirname(GO_BINARY),
+            "HOME": str(workspace.path),
+            "GOCACHE": str(self.gocache),
+            "GOPATH": str(self.workdir / "gopath"),
+            "GOFLAGS": "-mod=mod",
+            "GOPROXY": "off",
+            "GOTOOLCHAIN": "local",
+            "GO111MODULE": "on",
+            "CGO_ENABLED": "0"
+        }
+
+    async def _compile(self, workspace: Workspace, code: str) -> ProcessResult:
+        workspace.source.write_text(code)
+        if workspace.binary.exists():
+            workspace.binary.unlink()
+        started = time.perf_counter()
+        result = await run_process(
+            [GO_BINARY, "build", "-trimpath", "-o", str(workspace.binary), "."],
+            cwd=workspace.path,
+            env=self._build_env(workspace),
+            timeout=GRADER_COMPILE_TIMEOUT_SECONDS
+        )
+        self.compile_latency.record(time.perf_counter() - started)
+        return result
+
+    async def _run_binary(
+        self,
+        workspace: Workspace,
+        stdin: str,
+        timeout: float = GRADER_RUN_TIMEOUT_SECONDS,
+        output_limit: int = GRADER_OUTPUT_LIMIT_BYTES
+    ) -> ProcessResult:
+        uid = await self._run_slots.get()
+        try:
+            sandbox = self._sandbox_prefix(workspace, timeout, uid)
+            return await run_process(
+                sandbox + ["/" + workspace.binary.name if sandbox else str(workspace.binary)],
+                stdin=stdin,
+                cwd=workspace.jail,
+                env={"GOMAXPROCS": "1", "GOTRACEBACK": "single", "HOME": "/"},
+                timeout=timeout,
+                output_limit=output_limit
+            )
+        finally:
+            self._run_slots.put_nowait(uid)
+
+    async def _run_cases(self, workspace: Workspace, test_cases: List[TestCase], has_expectation: bool) -> Tuple[List[TestCaseResult], bool]:
+        # One process per case, all cases at once (bounded by the run slots).
+        # Also tells whether every case ran: after a fail-fast cancellation
+        # the cases that had not finished are reported as not run
+        results: Dict[int, TestCaseResult] = {}
+
+        async def run(index: int, test_case: TestCase) -> TestCaseResult:
+            process = await self._run_binary(workspace, test_case.input)
+            results[index] = _check_case(index, test_case, process, has_expectation)
+            return results[index]
+
+        tasks = [asyncio.create_task(run(index, test_case)) for index, test_case in enumerate(test_cases)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                if self.fail_fast and not result.passed:
+                    break
+        finally:
+            # Cancelled runs kill their process group
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        complete = len(results) == len(test_cases)
+        return [
+            results.get(index) or TestCaseResult(index=index, passed=False, error=NOT_RUN_ERROR)
+            for index in range(len(test_cases))
+        ], complete
+
+    async def _run_batch(self, workspace: Workspace, test_cases: List[TestCase]) -> List[TestCaseResult]:
+        # One process for every case, see BATCH_SEPARATOR
+        stdin = f"{len(test_cases)}\n" + "".join(
+            case.input if case.input.endswith("\n") else case.input + "\n" for case in test_cases
+        )
+        process = await self._run_binary(
+            workspace,
+            stdin,
+            timeout=GRADER_RUN_TIMEOUT_SECONDS * len(test_cases),
+            output_limit=GRADER_OUTPUT_LIMIT_BYTES * len(test_cases)
+        )
+        answers, remainder = _split_batch_output(process.stdout)
+        error = _run_error(process)
+        time_ms = round(process.elapsed * 1000 / len(test_cases), 1)
+
+        # A runtime error belongs to the case that was running when the
+        # program stopped; the cases after it never ran
+        failed_at = min(len(answers), len(test_cases) - 1) if error else None
+        results = []
+        for index, test_case in enumerate(test_cases):
+            answer = answers[index] if index < len(answers) else None
+            if failed_at is not None and index > failed_at:
+                results.append(TestCaseResult(index=index, passed=False, error=NOT_RUN_ERROR))
+            elif index == failed_at:
+                output = _normalize_output(answer if answer is not None else remainder)
+                results.append(TestCaseResult(index=index, passed=False, output=output, error=error, timeMs=time_ms))
+            elif answer is None:
+                error_text = f"Missing output: print a '{BATCH_SEPARATOR}' line after each answer"
+                results.append(TestCaseResult(index=index, passed=False, error=error_text, timeMs=time_ms))
+            else:
+                output = _normalize_output(answer)
+                passed = output == _normalize_output(test_case.expectedOutput)
+                results.append(TestCaseResult(index=index, passed=passed, output=output, timeMs=time_ms))
+        return results
+
+    async def grade(self, challenge: CodingChallenge, code: str, lesson_id: Optional[str] = None) -> CodeSubmissionResult:
+        # Resubmissions that differ only in comments and whitespace reuse the
+        # verdict. Binaries and compiler output (whose columns depend on the
+        # whitespace) are keyed by the exact source; the same source for
+        # another challenge reuses the binary
+        digest = source_hash(code)
+        exact_digest = exact_source_hash(code)
+        result_key = (lesson_id, challenge_hash(challenge), digest) if lesson_id else None
+        compile_key = (lesson_id, challenge_hash(challenge), exact_digest) if lesson_id else None
+        if result_key:
+            cached = grader_cache.get_result(result_key, compile_key)
+            if cached is not None:
+                return cached
+
+        started = time.perf_counter()
+        try:
+            async with self._workspace() as workspace:
+                artifact = grader_cache.get_artifact(exact_digest)
+                if artifact is not None:
+                    if workspace.binary.exists():
+                        workspace.binary.unlink()
+                    os.link(artifact, workspace.binary)
+                else:
+                    compiled = await self._compile(workspace, code)
+                    if compiled.timed_out or compiled.returncode != 0:
+                        error = "Compilation timed out" if compiled.timed_out else _clean_compiler_output(compiled.stderr, workspace)
+                        result = CodeSubmissionResult(success=False, output="Compilation failed", error=error)
+                        if compile_key and not compiled.timed_out:
+                            grader_cache.set_result(compile_key, result)
+                        return result
+                    # _compile always builds to a fresh inode, so the cached
+                    # hard link is never overwritten by a later build
+                    grader_cache.set_artifact(exact_digest, workspace.binary, self.process_dir / "artifacts")
+
+                test_cases = challenge.testCases or [TestCase(input="", expectedOutput="")]
+                if challenge.batchMode and challenge.testCases:
+                    results, complete = await self._run_batch(workspace, test_cases), True
+                else:
+                    results, complete = await self._run_cases(workspace, test_cases, has_expectation=bool(challenge.testCases))
+        finally:
+            self.grade_latency.record(time.perf_counter() - started)
+
+        result = _summarize(challenge, results)
+        # Which cases a fail-fast cancellation cut short depends on timing,
+        # so such verdicts are never cached
+        if result_key and complete and all(r.error != TIME_LIMIT_ERROR for r in results):
+            grader_cache.set_result(result_key, result)
+        return result
+
+    def shutdown(self):
+        # Cached binaries live in the process directory, so drop them with it
+        grader_cache.clear()
+        if self.process_dir is not None:
+            shutil.rmtree(self.process_dir, ignore_errors=True)
+            self.process_dir = None
+        self._pool = None
+
+    async def warm_up(self):
+        # Called in the background at startup; grading still works lazily
+        try:
+            await self.start()
+        except Exception as e:
+            logger.warning("Go runner not started: %s", e)
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "started": self._pool is not None,
+            "workers": self.workers,
+            "idleWorkers": self._pool.qsize() if self._pool is not None else 0,
+            "queueDepth": self.waiting,
+            "sandbox": self._sandbox_description(),
+            "runConcurrency": self.run_concurrency,
+            "failFast": self.fail_fast,
+            "compileTime": self.compile_latency.snapshot(),
+            "gradeTime": self.grade_latency.snapshot()
+        }
+
+def _remove_stale_process_dirs(workdir: Path):
+    # Directories left behind by grading processes that did not shut down
+    for path in workdir.glob("proc-*-*"):
+        try:
+            pid = int(path.name.split("-")[1])
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            shutil.rmtree(path, ignore_errors=True)
+        except (ValueError, PermissionError):
+            pass
+
+def _clean_compiler_output(stderr: str, workspace: Workspace) -> str:
+    # Hide sandbox paths from the student
+    return stderr.replace(str(workspace.path) + "/", "").replace("# sandbox\n", "").strip()
+
+def _run_error(run: ProcessResult) -> Optional[str]:
+    if run.timed_out or run.returncode in (-signal.SIGXCPU, 128 + signal.SIGXCPU):
+        return TIME_LIMIT_ERROR
+    if run.output_exceeded:
+        return "Output limit exceeded"
+    if any(marker in run.stderr for marker in OUT_OF_MEMORY_MARKERS):
+        return "Memory limit exceeded"
+    if run.returncode != 0:
+        return run.stderr.strip()[:ERROR_LIMIT_CHARS] or f"Program exited with code {run.returncode}"
+    return None
+
+def _split_batch_output(stdout: str) -> Tuple[List[str], str]:
+    answers, current = [], []
+    for line in stdout.replace("\r\n", "\n").split("\n"):
+        if line.rstrip() == BATCH_SEPARATOR:
+            answers.append("\n".join(current))
+            current = []
+        else:
+            current.append(line)
+    return answers, "\n".join(current)
+
+def _check_case(index: int, test_case: TestCase, run: ProcessResult, has_expectation: bool) -> TestCaseResult:
+    error = _run_error(run)
+    output = _normalize_output(run.stdout)
+    passed = error is None and (not has_expectation or output == _normalize_output(test_case.expectedOutput))
+    return TestCaseResult(
+        index=index,
+        passed=passed,
+        output=output,
+        error=error,
+        timeMs=round(run.elapsed * 1000, 1)
+    )
+
+def _summarize(challenge: CodingChallenge, results: List[TestCaseResult]) -> CodeSubmissionResult:
+    passed = [r for r in results if r.passed]
+    tests_pass = len(passed) == len(results)
+    # Report a case that actually failed rather than one that was skipped
+    failures = [r for r in results if not r.passed]
+    first_failure = next((r for r in failures if r.error != NOT_RUN_ERROR), failures[0] if failures else None)
+
+    error = None
+    if tests_pass:
+        output = results[0].output if len(results) == 1 else f"All tests passed: {len(passed)}/{len(results)}"
+    else:
+        output = first_failure.output
+        error = first_failure.error or f"Wrong answer on test {first_failure.index + 1}"
+
+    return CodeSubmissionResult(
+        success=all(r.error is None for r in results),
+        output=output,
+        error=error,
+        testsPass=tests_pass,
+        score=challenge.points if tests_pass else 0,
+        testResults=results
+    )
+
+# Shared by every request in this process
+go_runner = GoRunner()
@@ -0,0 +1,203 @@
+# Content-addressed cache of compiled submissions and grading verdicts
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from models import CodingChallenge, CodeSubmissionResult
+import hashlib
+import json
+import os
+
+GRADER_CACHE_ENABLED = os.getenv("GRADER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+GRADER_RESULT_CACHE_SIZE = int(os.getenv("GRADER_RESULT_CACHE_SIZE", "5000"))
+GRADER_ARTIFACT_CACHE_MB = int(os.getenv("GRADER_ARTIFACT_CACHE_MB", "256"))
+
+def normalize_source(code: str) -> str:
+    """Drop comments and insignificant whitespace from Go source.
+
+    Only text outside literals is touched: string, rune and raw string
+    literals are kept verbatim, including the indentation inside multi-line
+    raw strings. Newlines are kept too, since Go inserts semicolons at line
+    ends, which also keeps line numbers in runtime errors unchanged.
+    """
+    out = []
+    space = False  # whitespace seen since the last token on this line
+    i, n = 0, len(code)
+
+    def emit(text: str):
+        nonlocal space
+        if space:
+            out.append(" ")
+        out.append(text)
+        space = False
+
+    def newline():
+        nonlocal space
+        out.append("\n")
+        space = False
+
+    while i < n:
+        ch = code[i]
+        if ch in "\"'":
+            # Interpreted string or rune literal; ends at an unescaped quote or newline
+            j = i + 1
+            while j < n and code[j] != ch and code[j] != "\n":
+                j += 2 if code[j] == "\\" else 1
+            emit(code[i:j + 1])
+            i = j + 1
+        elif ch == "`":
+            j = code.find("`", i + 1)
+            j = n if j == -1 else j + 1
+            emit(code[i:j])
+            i = j
+        elif code.startswith("//", i):
+            j = code.find("\n", i)
+            i = n if j == -1 else j
+        elif code.startswith("/*", i):
+            j = code.find("*/", i + 2)
+            j = n if j == -1 else j + 2
+            # A comment spanning lines acts as a newline, otherwise as a space
+            for _ in range(code.count("\n", i, j)):
+                newline()
+            if "\n" not in code[i:j]:
+                space = bool(out) and out[-1] != "\n"
+            i = j
+        elif ch == "\n":
+            newline()
+            i += 1
+        elif ch in " \t\r":
+            # Leading and trailing whitespace of a line is dropped
+            space = bool(out) and out[-1] != "\n"
+            i += 1
+        else:
+            emit(ch)
+            i += 1
+    # Blank lines at either end; literals are never a bare newline item
+    while out and out[-1] == "\n":
+        out.pop()
+    start = 0
+    while start < len(out) and out[start] == "\n":
+        start += 1
+    return "".join(out[start:])
+
+def source_hash(code: str) -> str:
+    """Key for verdicts: equal for sources that differ only in comments and whitespace."""
+    return hashlib.sha256(normalize_source(code).encode()).hexdigest()
+
+def exact_source_hash(code: str) -> str:
+    """Key for compiled binaries and compiler output, which depend on the exact text."""
+    return hashlib.sha256(code.encode()).hexdigest()
+
+def challenge_hash(challenge: CodingChallenge) -> str:
+    # Only the parts that influence the verdict
+    payload = json.dumps({
+        "testCases": [case.dict() for case in challenge.testCases],
+        "batchMode": challenge.batchMode,
+        "points": challenge.points
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+class GraderCache:
+    """LRU caches for grading.
+
+    Verdicts are keyed by (lesson id, challenge hash, source hash), so an
+    edited challenge never serves stale verdicts even in other processes.
+    Compiled binaries depend only on the exact source and are shared across
+    lessons; they are bounded by total size on disk.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = GRADER_CACHE_ENABLED,
+        max_results: int = GRADER_RESULT_CACHE_SIZE,
+        max_artifact_bytes: int = GRADER_ARTIFACT_CACHE_MB * 1024 * 1024
+    ):
+        self.enabled = enabled
+        self.max_results = max_results
+        self.max_artifact_bytes = max_artifact_bytes
+        self._results: "OrderedDict[Tuple[str, str, str], CodeSubmissionResult]" = OrderedDict()
+        self._artifacts: "OrderedDict[str, Tuple[Path, int]]" = OrderedDict()
+        self.artifact_bytes = 0
+        self.result_hits = 0
+        self.result_misses = 0
+        self.artifact_hits = 0
+        self.artifact_misses = 0
+
+    def get_result(self, *keys: Tuple[str, str, str]) -> Optional[CodeSubmissionResult]:
+        # First of the keys that holds a verdict; counts as one lookup
+        if not self.enabled:
+            return None
+        for key in keys:
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                self.result_hits += 1
+                return result.copy(deep=True)
+        self.result_misses += 1
+        return None
+
+    def set_result(self, key: Tuple[str, str, str], result: CodeSubmissionResult):
+        if not self.enabled:
+            return
+        self._results[key] = result.copy(deep=True)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def invalidate_lesson(self, lesson_id: str) -> int:
+        stale = [key for key in self._results if key[0] == lesson_id]
+        for key in stale:
+            del self._results[key]
+        return len(stale)
+
+    def get_artifact(self, digest: str) -> Optional[Path]:
+        if not self.enabled:
+            return None
+        entry = self._artifacts.get(digest)
+        if entry is None or not entry[0].exists():
+            self.artifact_misses += 1
+            return None
+        self._artifacts.move_to_end(digest)
+        self.artifact_hits += 1
+        return entry[0]
+
+    def set_artifact(self, digest: str, binary: Path, cache_dir: Path):
+        """Hard-link a freshly built binary into the cache directory."""
+        if not self.enabled or digest in self._artifacts:
+            return
+        size = binary.stat().st_size
+        if size > self.max_artifact_bytes:
+            return
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        path = cache_dir / digest
+        if path.exists():
+            path.unlink()
+        os.link(binary, path)
+        self._artifacts[digest] = (path, size)
+        self.artifact_bytes += size
+        while self.artifact_bytes > self.max_artifact_bytes:
+            _, (old_path, old_size) = self._artifacts.popitem(last=False)
+            self.artifact_bytes -= old_size
+            # Workspaces run their own hard link, so in-flight runs are unaffected
+            old_path.unlink(missing_ok=True)
+
+    def clear(self):
+        self._results.clear()
+        for path, _ in self._artifacts.values():
+            path.unlink(missing_ok=True)
+        self._artifacts.clear()
+        self.artifact_bytes = 0
+
+    def stats(self) -> Dict[str, object]:
+        result_lookups = self.result_hits + self.result_misses
+        artifact_lookups = self.artifact_hits + self.artifact_misses
+        return {
+            "enabled": self.enabled,
+            "results": len(self._results),
+            "resultHitRate": round(self.result_hits / result_lookups, 4) if result_lookups else 0.0,
+            "artifacts": len(self._artifacts),
+            "artifactMB": round(self.artifact_bytes / 1024 / 1024, 1),
+            "artifactHitRate": round(self.artifact_hits / artifact_lookups, 4) if artifact_lookups else 0.0
+        }
+
+# Shared by the grader and DatabaseService (for invalidation) in this process
+grader_cache = GraderCache()
@@ -0,0 +1,38 @@
+# HTTP validators (ETag / If-None-Match) and Cache-Control policies
+from fastapi import Request, Response
+import hashlib
+import os
+
+CATALOG_MAX_AGE_SECONDS = int(os.getenv("CATALOG_MAX_AGE_SECONDS", "0"))
+
+# Catalog endpoints are public and never carry solutions or test cases
+# (see PublicLesson); clients revalidate with If-None-Match
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE_SECONDS}, must-revalidate"
+# Lessons are behind auth and carry solutions - never store in shared caches
+LESSON_CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    # "*" matches any current representation, so only call this once the
+    # resource is known to exist; a missing one must still get its 404
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as required for If-None-Match
+    return _opaque(etag) in {_opaque(tag) for tag in if_none_match.split(",")}
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def set_validators(response: Response, etag: str, cache_control: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
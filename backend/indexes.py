@@ -0,0 +1,194 @@
+# Index management for the MongoDB collections used by DatabaseService
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from typing import List, Dict, Any, Iterator
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Required indexes per collection. All lookups go through the app-level
+# string ids, never through _id, so each of them needs its own index.
+REQUIRED_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("role", ASCENDING)], name="role"),
+        # Admin dashboard: active users and latest registrations
+        IndexModel([("profile.lastActiveDate", ASCENDING)], name="profile_lastActiveDate"),
+        IndexModel([("createdAt", DESCENDING)], name="createdAt"),
+    ],
+    "courses": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("order", ASCENDING)], name="order"),
+        IndexModel([("updatedAt", DESCENDING)], name="updatedAt"),
+    ],
+    "lessons": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("courseId", ASCENDING), ("order", ASCENDING)], name="courseId_order"),
+    ],
+    "progress": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("userId", ASCENDING), ("lessonId", ASCENDING)], name="userId_lessonId_unique", unique=True),
+        IndexModel([("userId", ASCENDING), ("courseId", ASCENDING)], name="userId_courseId"),
+        IndexModel([("courseId", ASCENDING)], name="courseId"),
+        IndexModel([("classroomId", ASCENDING)], name="classroomId"),
+    ],
+    "classrooms": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("inviteCode", ASCENDING)], name="inviteCode_unique", unique=True),
+        IndexModel([("teacherId", ASCENDING)], name="teacherId"),
+    ],
+    "enrollments": [
+        IndexModel([("classroomId", ASCENDING), ("studentId", ASCENDING)], name="classroomId_studentId_unique", unique=True),
+        IndexModel([("studentId", ASCENDING)], name="studentId"),
+        IndexModel([("classroomId", ASCENDING), ("enrolledAt", ASCENDING)], name="classroomId_enrolledAt"),
+    ],
+    "progress_rollups": [
+        IndexModel([("userId", ASCENDING), ("courseId", ASCENDING)], name="userId_courseId_unique", unique=True),
+    ],
+    "progress_totals": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "achievements": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("userId", ASCENDING), ("earnedAt", DESCENDING)], name="userId_earnedAt"),
+        # Each achievement is awarded once; awards upsert on this key
+        IndexModel([("userId", ASCENDING), ("type", ASCENDING)], name="userId_type_unique", unique=True),
+    ],
+    "token_versions": [
+        IndexModel([("userId", ASCENDING)], name="userId_unique", unique=True),
+    ],
+    "submissions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("createdAt", ASCENDING)], name="status_createdAt"),
+        IndexModel(
+            [("userId", ASCENDING), ("idempotencyKey", ASCENDING)],
+            name="userId_idempotencyKey_unique",
+            unique=True,
+            partialFilterExpression={"idempotencyKey": {"$type": "string"}}
+        ),
+        # Finished jobs are kept for a week; queued and running ones have no finishedAt
+        IndexModel([("finishedAt", ASCENDING)], name="finishedAt_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ],
+}
+
+# Query shapes issued by DatabaseService: (name, collection, filter, sort).
+# Values are placeholders, only the shape matters to the query planner.
+QUERY_SHAPES: List[Dict[str, Any]] = [
+    {"name": "get_user_by_id", "collection": "users", "filter": {"id": "?"}},
+    {"name": "get_user_by_email", "collection": "users", "filter": {"email": "?"}},
+    {"name": "get_users_by_emails", "collection": "users", "filter": {"email": {"$in": ["?", "?"]}}},
+    {"name": "get_courses", "collection": "courses", "filter": {}, "sort": [("order", ASCENDING)]},
+    {"name": "get_course_by_id", "collection": "courses", "filter": {"id": "?"}},
+    {"name": "get_lessons_by_course", "collection": "lessons", "filter": {"courseId": "?"}, "sort": [("order", ASCENDING)]},
+    {"name": "get_lesson_by_id", "collection": "lessons", "filter": {"id": "?"}},
+    {"name": "get_classrooms_by_teacher", "collection": "classrooms", "filter": {"teacherId": "?"}},
+    {"name": "get_classroom_by_id", "collection": "classrooms", "filter": {"id": "?"}},
+    {"name": "get_classroom_by_invite_code", "collection": "classrooms", "filter": {"inviteCode": "?"}},
+    {"name": "get_student_classrooms", "collection": "enrollments", "filter": {"studentId": "?"}},
+    {"name": "is_enrolled", "collection": "enrollments", "filter": {"classroomId": "?", "studentId": "?"}},
+    {"name": "get_classroom_student_ids", "collection": "enrollments", "filter": {"classroomId": "?"}, "sort": [("enrolledAt", ASCENDING)]},
+    {"name": "create_or_update_progress", "collection": "progress", "filter": {"userId": "?", "lessonId": "?"}},
+    {"name": "update_progress", "collection": "progress", "filter": {"id": "?"}},
+    {"name": "get_user_progress", "collection": "progress", "filter": {"userId": "?"}},
+    {"name": "get_progress_totals", "collection": "progress_totals", "filter": {"userId": "?"}},
+    {"name": "get_progress_rollups", "collection": "progress_rollups", "filter": {"userId": "?"}},
+    {"name": "get_course_progress", "collection": "progress", "filter": {"userId": "?", "courseId": "?"}},
+    {"name": "get_classroom_progress", "collection": "progress", "filter": {"classroomId": "?"}},
+    {"name": "get_admin_dashboard_stats.roles", "collection": "users", "filter": {"role": "?"}},
+    {"name": "get_admin_dashboard_stats.active", "collection": "users", "filter": {"profile.lastActiveDate": {"$gte": "?"}}},
+    {"name": "get_admin_dashboard_stats.recent_users", "collection": "users", "filter": {}, "sort": [("createdAt", DESCENDING)]},
+    {"name": "get_admin_dashboard_stats.recent_courses", "collection": "courses", "filter": {}, "sort": [("updatedAt", DESCENDING)]},
+    {"name": "award_achievement", "collection": "achievements", "filter": {"userId": "?", "type": "?"}},
+    {"name": "get_user_achievements", "collection": "achievements", "filter": {"userId": "?"}, "sort": [("earnedAt", DESCENDING)]},
+    {"name": "token_versions.get", "collection": "token_versions", "filter": {"userId": "?"}},
+    {"name": "submission_queue.claim", "collection": "submissions", "filter": {"status": "?"}, "sort": [("createdAt", ASCENDING)]},
+    {"name": "submission_queue.get", "collection": "submissions", "filter": {"id": "?"}},
+]
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Create all required indexes. Safe to call on every startup."""
+    created = {}
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        created[collection_name] = []
+        for index in indexes:
+            try:
+                created[collection_name].extend(await db[collection_name].create_indexes([index]))
+            except OperationFailure as e:
+                # Typically duplicate data blocking a unique index - keep serving
+                logger.error("Failed to create index %s on %s: %s", index.document["name"], collection_name, e)
+    return created
+
+def _plan_stages(plan: Dict[str, Any]) -> Iterator[str]:
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    # Newer servers wrap the classic plan in "queryPlan"
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+def _index_names(plan: Dict[str, Any]) -> List[str]:
+    names = []
+    if not isinstance(plan, dict):
+        return names
+    if plan.get("indexName"):
+        names.append(plan["indexName"])
+    for key in ("queryPlan", "inputStage"):
+        if key in plan:
+            names.extend(_index_names(plan[key]))
+    for child in plan.get("inputStages", []):
+        names.extend(_index_names(child))
+    return names
+
+async def explain_query_shapes(db: AsyncIOMotorDatabase) -> List[Dict[str, Any]]:
+    """Run explain() on every DatabaseService query shape and flag collection scans."""
+    report = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape["collection"]].find(shape["filter"])
+        if shape.get("sort"):
+            cursor = cursor.sort(shape["sort"])
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning_plan))
+        index_names = _index_names(winning_plan)
+        report.append({
+            "query": shape["name"],
+            "collection": shape["collection"],
+            "filter": list(shape["filter"].keys()),
+            "stages": stages,
+            "indexes": index_names,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+async def _main():
+    import os
+    import sys
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    if "--create" in sys.argv:
+        await ensure_indexes(db)
+
+    report = await explain_query_shapes(db)
+    for entry in report:
+        marker = "COLLSCAN" if entry["collscan"] else "ok"
+        print(f"{marker:8} {entry['collection']:12} {entry['query']:30} {', '.join(entry['indexes']) or '-'}")
+    client.close()
+
+    if any(entry["collscan"] for entry in report):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    # Usage: python indexes.py [--create]
+    import asyncio
+    asyncio.run(_main())
@@ -0,0 +1,32 @@
+# Lightweight in-process latency metrics
+from collections import deque
+from typing import Deque
+
+class LatencyRecorder:
+    """Keeps the last `window` samples and reports percentiles in milliseconds."""
+
+    def __init__(self, window: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"count": self.count, "avgMs": 0.0, "p50Ms": 0.0, "p95Ms": 0.0, "p99Ms": 0.0, "maxMs": 0.0}
+
+        def percentile(p: float) -> float:
+            index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[index] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "avgMs": round(sum(samples) / len(samples) * 1000, 3),
+            "p50Ms": percentile(0.50),
+            "p95Ms": percentile(0.95),
+            "p99Ms": percentile(0.99),
+            "maxMs": round(samples[-1] * 1000, 3)
+        }
@@ -0,0 +1,92 @@
+# Moves classroom membership from the embedded classrooms.students array
+# into the enrollments collection
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Dict
+from models import Enrollment
+from indexes import ensure_indexes
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def backfill_enrollments(db: AsyncIOMotorDatabase) -> Dict[str, int]:
+    """Create an enrollment for every id in an embedded roster.
+
+    Idempotent: existing enrollments are kept as they are. Enrollment times
+    follow the roster order, starting at the classroom's creation time.
+    """
+    stats = {"classrooms": 0, "enrollments": 0}
+    cursor = db.classrooms.find({"students.0": {"$exists": True}}, {"_id": 0, "id": 1, "students": 1, "createdAt": 1})
+    async for classroom in cursor:
+        stats["classrooms"] += 1
+        enrollments = [
+            Enrollment(
+                classroomId=classroom["id"],
+                studentId=student_id,
+                enrolledAt=classroom["createdAt"] + timedelta(milliseconds=position)
+            ).dict()
+            for position, student_id in enumerate(dict.fromkeys(classroom["students"]))
+        ]
+        try:
+            result = await db.enrollments.insert_many(enrollments, ordered=False)
+            stats["enrollments"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            stats["enrollments"] += e.details["nInserted"]
+    return stats
+
+async def recount_students(db: AsyncIOMotorDatabase) -> int:
+    """Reset every classroom's studentCount from the enrollments collection."""
+    counts = {}
+    async for row in db.enrollments.aggregate([{"$group": {"_id": "$classroomId", "count": {"$sum": 1}}}]):
+        counts[row["_id"]] = row["count"]
+    
+    requests = []
+    async for classroom in db.classrooms.find({}, {"_id": 0, "id": 1, "studentCount": 1}):
+        count = counts.get(classroom["id"], 0)
+        if classroom.get("studentCount") != count:
+            requests.append(UpdateOne({"id": classroom["id"]}, {"$set": {"studentCount": count}}))
+    if requests:
+        await db.classrooms.bulk_write(requests, ordered=False)
+    return len(requests)
+
+async def drop_embedded_rosters(db: AsyncIOMotorDatabase) -> int:
+    result = await db.classrooms.update_many({"students": {"$exists": True}}, {"$unset": {"students": ""}})
+    return result.modified_count
+
+async def _main():
+    import argparse
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    load_dotenv(Path(__file__).parent / '.env')
+    from database import CLASSROOM_MEMBERSHIP
+
+    parser = argparse.ArgumentParser(description="Backfill classroom enrollments")
+    parser.add_argument("--drop-embedded", action="store_true", help="remove classrooms.students afterwards")
+    args = parser.parse_args()
+
+    if args.drop_embedded and CLASSROOM_MEMBERSHIP == "dual":
+        raise SystemExit("Refusing to drop embedded rosters while CLASSROOM_MEMBERSHIP=dual")
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        stats = await backfill_enrollments(db)
+        logger.info("Backfilled %d enrollments from %d classrooms", stats["enrollments"], stats["classrooms"])
+        logger.info("Corrected studentCount on %d classrooms", await recount_students(db))
+        if args.drop_embedded:
+            logger.info("Dropped embedded rosters from %d classrooms", await drop_embedded_rosters(db))
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    # Usage: python migrate_enrollments.py [--drop-embedded]
+    import asyncio
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main())
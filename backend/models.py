@@ -20,6 +20,12 @@ class ProgressStatus(str, Enum):
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
 
+class SubmissionStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class Difficulty(str, Enum):
     EASY = "easy"
     MEDIUM = "medium"
@@ -70,6 +76,8 @@ class CodingChallenge(BaseModel):
     template: str
     solution: str
     testCases: List[TestCase] = []
+    # Grade every test case in one run; see go_runner.BATCH_SEPARATOR
+    batchMode: bool = False
     points: int = 10
     difficulty: Difficulty = Difficulty.EASY
     hints: List[str] = []
@@ -107,6 +115,40 @@ class Lesson(BaseModel):
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
+# What the public course endpoints show of a coding challenge: the
+# solution and the test cases stay on the server
+class PublicCodingChallenge(BaseModel):
+    template: str
+    batchMode: bool = False
+    points: int = 10
+    difficulty: Difficulty = Difficulty.EASY
+    hints: List[str] = []
+
+class PublicLesson(BaseModel):
+    id: str
+    title: str
+    description: str
+    content: str = ""
+    type: LessonType
+    duration: int
+    order: int
+    courseId: str
+    codingChallenge: Optional[PublicCodingChallenge] = None
+    createdAt: datetime
+    updatedAt: datetime
+
+# Lesson header without content or coding challenge
+class LessonSummary(BaseModel):
+    id: str
+    title: str
+    description: str
+    type: LessonType
+    duration: int
+    order: int
+    courseId: str
+    createdAt: datetime
+    updatedAt: datetime
+
 # Course Models
 class CourseCreate(BaseModel):
     title: str
@@ -134,6 +176,11 @@ class Course(BaseModel):
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
+class CourseSummary(BaseModel):
+    id: str
+    title: str
+    order: int
+
 class CourseWithLessons(BaseModel):
     id: str
     title: str
@@ -142,7 +189,20 @@ class CourseWithLessons(BaseModel):
     color: str
     isPublished: bool
     createdBy: str
-    lessons: List[Lesson]
+    lessons: List[PublicLesson]
+    duration: str
+    createdAt: datetime
+    updatedAt: datetime
+
+class CourseWithLessonSummaries(BaseModel):
+    id: str
+    title: str
+    description: str
+    order: int
+    color: str
+    isPublished: bool
+    createdBy: str
+    lessons: List[LessonSummary]
     duration: str
     createdAt: datetime
     updatedAt: datetime
@@ -165,13 +225,18 @@ class Classroom(BaseModel):
     name: str
     description: str
     teacherId: str
-    students: List[str] = []  # user IDs
+    studentCount: int = 0  # members live in the enrollments collection
     courseIds: List[str] = []
     maxStudents: int = 20
     inviteCode: str
     isActive: bool = True
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
+class Enrollment(BaseModel):
+    classroomId: str
+    studentId: str
+    enrolledAt: datetime = Field(default_factory=datetime.utcnow)
+
 class ClassroomResponse(BaseModel):
     id: str
     name: str
@@ -184,6 +249,17 @@ class ClassroomResponse(BaseModel):
     isActive: bool
     createdAt: datetime
 
+class RosterImport(BaseModel):
+    emails: List[str]
+
+class RosterImportResult(BaseModel):
+    enrolled: List[str] = []
+    alreadyEnrolled: List[str] = []
+    notFound: List[str] = []
+    notStudents: List[str] = []
+    students: int  # count after the import
+    maxStudents: int
+
 # Progress Models
 class ProgressCreate(BaseModel):
     lessonId: str
@@ -195,6 +271,28 @@ class ProgressUpdate(BaseModel):
     score: Optional[int] = None
     timeSpent: Optional[int] = None
 
+class ProgressEvent(BaseModel):
+    lessonId: str
+    classroomId: Optional[str] = None
+    status: Optional[ProgressStatus] = None
+    score: Optional[int] = None
+    timeSpent: Optional[int] = None
+
+class ProgressBatch(BaseModel):
+    events: List[ProgressEvent]
+
+class ProgressEventResult(BaseModel):
+    index: int
+    lessonId: str
+    ok: bool
+    progressId: Optional[str] = None
+    error: Optional[str] = None
+
+class ProgressBatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: List[ProgressEventResult]
+
 class Progress(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     userId: str
@@ -207,6 +305,25 @@ class Progress(BaseModel):
     completedAt: Optional[datetime] = None
     attempts: int = 0
 
+class ProgressRollup(BaseModel):
+    userId: str
+    courseId: str
+    lessons: int = 0  # progress documents in any status
+    completed: int = 0
+    codingCompleted: int = 0
+    score: int = 0
+    timeSpent: int = 0  # minutes
+    lastActivity: Optional[datetime] = None
+
+class ProgressTotals(BaseModel):
+    userId: str
+    lessons: int = 0
+    completed: int = 0
+    codingCompleted: int = 0
+    score: int = 0
+    timeSpent: int = 0  # minutes
+    lastActivity: Optional[datetime] = None
+
 # Achievement Models
 class AchievementCreate(BaseModel):
     type: str
@@ -230,12 +347,36 @@ class CodeSubmission(BaseModel):
     lessonId: str
     code: str
 
+class TestCaseResult(BaseModel):
+    index: int
+    passed: bool
+    output: str = ""
+    error: Optional[str] = None
+    timeMs: float = 0
+
 class CodeSubmissionResult(BaseModel):
     success: bool
     output: str
     error: Optional[str] = None
     testsPass: bool = False
     score: int = 0
+    testResults: List[TestCaseResult] = []
+
+class SubmissionJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    userId: str
+    lessonId: str
+    courseId: str
+    code: str
+    idempotencyKey: Optional[str] = None
+    status: SubmissionStatus = SubmissionStatus.QUEUED
+    attempts: int = 0
+    result: Optional[CodeSubmissionResult] = None
+    error: Optional[str] = None
+    committed: bool = False
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
 
 # JWT Token Models
 class Token(BaseModel):
@@ -244,6 +385,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    userId: Optional[str] = None
+    role: Optional[UserRole] = None
+    version: Optional[int] = None
 
 # Analytics Models
 class StudentProgressSummary(BaseModel):
@@ -0,0 +1,99 @@
+# Password hashing off the event loop
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from passlib.context import CryptContext
+from typing import Optional
+from metrics import LatencyRecorder
+import asyncio
+import os
+import time
+
+# "thread" works well because bcrypt releases the GIL; "process" isolates it fully
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Concurrent hash operations allowed before callers start queueing
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(PASSWORD_HASH_WORKERS)))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded worker pool and tracks queue depth."""
+
+    def __init__(
+        self,
+        executor_kind: str = PASSWORD_HASH_EXECUTOR,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_concurrency: int = PASSWORD_HASH_MAX_CONCURRENCY
+    ):
+        self.executor_kind = executor_kind
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.max_waiting = 0
+        self.in_flight = 0
+        self.wait_latency = LatencyRecorder()
+        self.run_latency = LatencyRecorder()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    async def _run(self, func, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.wait_latency.record(started_at - queued_at)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self.run_latency.record(time.perf_counter() - started_at)
+            self._semaphore.release()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "maxConcurrency": self.max_concurrency,
+            "inFlight": self.in_flight,
+            "queueDepth": self.waiting,
+            "maxQueueDepth": self.max_waiting,
+            "queueWait": self.wait_latency.snapshot(),
+            "hashTime": self.run_latency.snapshot()
+        }
+
+# Shared by every AuthService instance in this process
+password_hasher = PasswordHasher()
@@ -0,0 +1,196 @@
+# Per-(user, course) and per-user progress totals, kept up to date from progress writes
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from models import LessonType, ProgressRollup, ProgressStatus, ProgressTotals
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000
+# meta document recording that the rollups were built for this database
+BACKFILL_MARKER = "progress_rollups"
+# A backfill claimed longer ago than this is assumed dead and taken over
+BACKFILL_STALE_AFTER = timedelta(minutes=30)
+
+COUNTERS = ("lessons", "completed", "codingCompleted", "score", "timeSpent")
+
+def apply_update(doc: Optional[Dict[str, Any]], update: Dict[str, Dict[str, Any]], query: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a progress update ($set, $setOnInsert, $inc, $max) to a copy of doc.
+
+    Lets writers that fetched the pre-image with find_one_and_update know
+    the post-image without a second read. doc is None when an upsert
+    inserts; the new document then starts from the query's fields.
+    """
+    result = dict(doc) if doc else {**query, **update.get("$setOnInsert", {})}
+    result.update(update.get("$set", {}))
+    for key, amount in update.get("$inc", {}).items():
+        result[key] = result.get(key, 0) + amount
+    for key, value in update.get("$max", {}).items():
+        if key not in result or result[key] is None or value > result[key]:
+            result[key] = value
+    return result
+
+def rollup_delta(before: Optional[Dict[str, Any]], after: Dict[str, Any], coding: bool = False) -> Dict[str, int]:
+    """Counter changes caused by one progress document going from before to after."""
+    def completed(doc):
+        return 1 if doc and doc.get("status") in (ProgressStatus.COMPLETED, ProgressStatus.COMPLETED.value) else 0
+
+    before = before or {}
+    delta = {
+        "lessons": 0 if before else 1,
+        "completed": completed(after) - completed(before),
+        "codingCompleted": completed(after) - completed(before) if coding else 0,
+        "score": (after.get("score") or 0) - (before.get("score") or 0),
+        "timeSpent": (after.get("timeSpent") or 0) - (before.get("timeSpent") or 0)
+    }
+    return {key: value for key, value in delta.items() if value}
+
+def sum_deltas(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    total: Dict[str, int] = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            total[key] = total.get(key, 0) + value
+    return {key: value for key, value in total.items() if value}
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase, user_id: Optional[str] = None) -> int:
+    """Recompute rollups and totals from the progress collection, for one
+    user or everyone.
+
+    Rollups without progress behind them are removed. Returns the number
+    of rollups written.
+    """
+    match = {"userId": user_id} if user_id else {}
+    coding_ids = [lesson["id"] async for lesson in db.lessons.find({"type": LessonType.CODING.value}, {"_id": 0, "id": 1})]
+    is_completed = {"$eq": ["$status", ProgressStatus.COMPLETED.value]}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"userId": "$userId", "courseId": "$courseId"},
+            "lessons": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [is_completed, 1, 0]}},
+            "codingCompleted": {"$sum": {"$cond": [{"$and": [is_completed, {"$in": ["$lessonId", coding_ids]}]}, 1, 0]}},
+            "score": {"$sum": "$score"},
+            "timeSpent": {"$sum": "$timeSpent"},
+            # Progress documents only record when they were completed
+            "lastActivity": {"$max": "$completedAt"}
+        }}
+    ]
+
+    written = 0
+    seen = set()
+    batch = []
+    async for row in db.progress.aggregate(pipeline, allowDiskUse=True):
+        rollup = ProgressRollup(**row["_id"], **{key: value for key, value in row.items() if key != "_id"})
+        seen.add((rollup.userId, rollup.courseId))
+        batch.append(ReplaceOne({"userId": rollup.userId, "courseId": rollup.courseId}, rollup.dict(exclude_none=True), upsert=True))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await db.progress_rollups.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await db.progress_rollups.bulk_write(batch, ordered=False)
+        written += len(batch)
+
+    stale = [
+        rollup["_id"]
+        async for rollup in db.progress_rollups.find(match, {"_id": 1, "userId": 1, "courseId": 1})
+        if (rollup["userId"], rollup["courseId"]) not in seen
+    ]
+    if stale:
+        await db.progress_rollups.delete_many({"_id": {"$in": stale}})
+
+    # Per-user totals are the sum of the user's rollups
+    totals_pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$userId",
+            **{counter: {"$sum": f"${counter}"} for counter in COUNTERS},
+            "lastActivity": {"$max": "$lastActivity"}
+        }}
+    ]
+    batch = []
+    users = set()
+    async for row in db.progress_rollups.aggregate(totals_pipeline, allowDiskUse=True):
+        totals = ProgressTotals(userId=row["_id"], **{key: value for key, value in row.items() if key != "_id"})
+        users.add(totals.userId)
+        batch.append(ReplaceOne({"userId": totals.userId}, totals.dict(exclude_none=True), upsert=True))
+        if len(batch) >= REBUILD_BATCH_SIZE:
+            await db.progress_totals.bulk_write(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.progress_totals.bulk_write(batch, ordered=False)
+    stale = [totals["_id"] async for totals in db.progress_totals.find(match, {"_id": 1, "userId": 1}) if totals["userId"] not in users]
+    if stale:
+        await db.progress_totals.delete_many({"_id": {"$in": stale}})
+    return written
+
+async def ensure_rollups(db: AsyncIOMotorDatabase, poll_seconds: float = 1.0) -> bool:
+    """Build every rollup once for a database that predates them.
+
+    Call before serving reads or writes that use the rollups. One process
+    claims the backfill through the meta marker; the others wait until it
+    is done. Returns True if this process ran it.
+    """
+    while True:
+        marker = await db.meta.find_one({"_id": BACKFILL_MARKER})
+        if marker and marker.get("state") == "done":
+            return False
+        now = datetime.utcnow()
+        claimed = False
+        if marker is None:
+            try:
+                await db.meta.insert_one({"_id": BACKFILL_MARKER, "state": "building", "startedAt": now})
+                claimed = True
+            except DuplicateKeyError:
+                pass
+        elif marker["startedAt"] < now - BACKFILL_STALE_AFTER:
+            result = await db.meta.update_one(
+                {"_id": BACKFILL_MARKER, "state": "building", "startedAt": marker["startedAt"]},
+                {"$set": {"startedAt": now}}
+            )
+            claimed = result.modified_count == 1
+        if claimed:
+            logger.info("Backfilling progress rollups")
+            written = await rebuild_rollups(db)
+            await _mark_built(db)
+            logger.info("Backfilled %d progress rollups", written)
+            return True
+        await asyncio.sleep(poll_seconds)
+
+async def _mark_built(db: AsyncIOMotorDatabase):
+    await db.meta.update_one(
+        {"_id": BACKFILL_MARKER},
+        {"$set": {"state": "done", "builtAt": datetime.utcnow()}},
+        upsert=True
+    )
+
+async def _main():
+    import argparse
+    import os
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from indexes import ensure_indexes
+
+    parser = argparse.ArgumentParser(description="Rebuild progress rollups from the progress collection")
+    parser.add_argument("--user", help="only rebuild this user's rollups")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db)
+        logger.info("Rebuilt %d progress rollups", await rebuild_rollups(db, args.user))
+        if not args.user:
+            await _mark_built(db)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    # Usage: python progress_rollups.py [--user USER_ID]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main())
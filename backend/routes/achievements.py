@@ -1,6 +1,6 @@
 # Achievement system routes
 from fastapi import APIRouter, Depends, HTTPException, status
-from dependencies import get_current_user, get_db_service
+from dependencies import get_current_user, get_token_claims, get_db_service
 from models import *
 from typing import List
 
@@ -8,10 +8,10 @@ router = APIRouter(prefix="/achievements", tags=["achievements"])
 
 @router.get("/me", response_model=List[Achievement])
 async def get_my_achievements(
-    current_user: User = Depends(get_current_user),
+    claims: TokenData = Depends(get_token_claims),
     db_service = Depends(get_db_service)
 ):
-    achievements = await db_service.get_user_achievements(current_user.id)
+    achievements = await db_service.get_user_achievements(claims.userId)
     return achievements
 
 @router.post("/", response_model=Achievement)
@@ -28,101 +28,27 @@ async def award_achievement(
             detail="Cannot award achievements to other users"
         )
     
-    # Check if user already has this achievement
-    existing_achievements = await db_service.get_user_achievements(user_id)
-    for ach in existing_achievements:
-        if ach.type == achievement_create.type:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User already has this achievement"
-            )
-    
     achievement = Achievement(
         userId=user_id,
         **achievement_create.dict()
     )
     
-    created_achievement = await db_service.create_achievement(achievement)
-    return created_achievement
+    # Awards are unique per type; an existing award is returned unchanged
+    stored_achievement, _ = await db_service.award_achievement(achievement)
+    return stored_achievement
 
 # Automatic achievement checking system
-async def check_and_award_achievements(user_id: str, db_service):
-    """Check if user qualifies for new achievements and award them"""
+async def check_and_award_achievements(user_id: str, db_service) -> List[Achievement]:
+    """Re-evaluate every rule for the user and award what is missing.
+
+    Progress writes already award achievements as they happen; this is
+    the full check for repairs and rule changes.
+    """
     user = await db_service.get_user_by_id(user_id)
     if not user:
-        return
-    
-    user_progress = await db_service.get_user_progress(user_id)
-    completed_lessons = [p for p in user_progress if p.status == ProgressStatus.COMPLETED]
-    existing_achievements = await db_service.get_user_achievements(user_id)
-    existing_types = [ach.type for ach in existing_achievements]
-    
-    # First lesson completed
-    if len(completed_lessons) >= 1 and "first_lesson" not in existing_types:
-        achievement = Achievement(
-            userId=user_id,
-            type="first_lesson",
-            title="Первые шаги",
-            description="Завершил первый урок",
-            icon="🎯",
-            points=10
-        )
-        await db_service.create_achievement(achievement)
-    
-    # First coding lesson
-    coding_lessons = [p for p in completed_lessons if p.lessonId in ["3", "5", "6"]]  # Coding lesson IDs
-    if len(coding_lessons) >= 1 and "first_code" not in existing_types:
-        achievement = Achievement(
-            userId=user_id,
-            type="first_code",
-            title="Программист",
-            description="Написал первую программу",
-            icon="💻",
-            points=25
-        )
-        await db_service.create_achievement(achievement)
-    
-    # 5 lessons completed
-    if len(completed_lessons) >= 5 and "five_lessons" not in existing_types:
-        achievement = Achievement(
-            userId=user_id,
-            type="five_lessons",
-            title="Настойчивость",
-            description="Завершил 5 уроков",
-            icon="🔥",
-            points=50
-        )
-        await db_service.create_achievement(achievement)
-    
-    # 10 lessons completed
-    if len(completed_lessons) >= 10 and "ten_lessons" not in existing_types:
-        achievement = Achievement(
-            userId=user_id,
-            type="ten_lessons",
-            title="Исследователь",
-            description="Завершил 10 уроков",
-            icon="🔍",
-            points=100
-        )
-        await db_service.create_achievement(achievement)
+        return []
     
-    # First course completed
-    courses = await db_service.get_courses()
-    for course in courses:
-        course_lessons = await db_service.get_lessons_by_course(course.id)
-        course_progress = [p for p in completed_lessons if p.courseId == course.id]
-        
-        if len(course_progress) >= len(course_lessons) and f"course_{course.id}" not in existing_types:
-            achievement = Achievement(
-                userId=user_id,
-                type=f"course_{course.id}",
-                title="Мастер курса",
-                description=f"Завершил курс '{course.title}'",
-                icon="🏆",
-                points=200
-            )
-            await db_service.create_achievement(achievement)
-            break  # Only award one course completion at a time
+    return await db_service.recheck_achievements(user_id)
 
 @router.post("/check/{user_id}")
 async def check_user_achievements(
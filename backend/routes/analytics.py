@@ -1,9 +1,20 @@
 # Analytics and reporting routes
 from fastapi import APIRouter, Depends, HTTPException, status
 from dependencies import get_current_user, require_admin, require_teacher_or_admin, get_db_service
+from indexes import explain_query_shapes
+from user_cache import user_cache
+from token_versions import token_versions
+from password_hasher import password_hasher
+from catalog_cache import catalog_cache
+from go_runner import go_runner
+from grader_cache import grader_cache
+from dashboard_snapshot import dashboard_snapshot, course_analytics_snapshot
+from database import commit_latency, commit_counts
+from submission_queue import submission_queue
 from models import *
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
+import asyncio
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -12,63 +23,79 @@ async def get_admin_dashboard(
     current_user: User = Depends(require_admin),
     db_service = Depends(get_db_service)
 ):
-    # Get basic counts
-    total_users = await db_service.db.users.count_documents({})
-    total_students = await db_service.db.users.count_documents({"role": "student"})
-    total_teachers = await db_service.db.users.count_documents({"role": "teacher"})
-    total_courses = await db_service.db.courses.count_documents({})
-    total_lessons = await db_service.db.lessons.count_documents({})
-    total_classrooms = await db_service.db.classrooms.count_documents({})
-    
-    # Active users (last 7 days)
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    active_users = await db_service.db.users.count_documents({
-        "profile.lastActiveDate": {"$gte": week_ago}
-    })
-    
-    # Recent activity
-    recent_activity = []
-    
-    # Recent user registrations
-    recent_users_cursor = db_service.db.users.find().sort("createdAt", -1).limit(3)
-    async for user in recent_users_cursor:
-        recent_activity.append({
+    # Served from a snapshot that is refreshed at most every few seconds
+    stats = await dashboard_snapshot.get(db_service.get_admin_dashboard_stats)
+    
+    # Recent activity: user registrations and course updates
+    recent_activity = [
+        {
             "type": "user_registered",
             "title": f"Новый пользователь: {user['name']}",
             "author": "Система",
             "timestamp": user["createdAt"]
-        })
-    
-    # Recent course updates
-    recent_courses_cursor = db_service.db.courses.find().sort("updatedAt", -1).limit(2)
-    async for course in recent_courses_cursor:
-        recent_activity.append({
+        }
+        for user in stats["recentUsers"]
+    ] + [
+        {
             "type": "course_updated",
             "title": f"Обновлен курс '{course['title']}'",
             "author": "Админ",
             "timestamp": course["updatedAt"]
-        })
+        }
+        for course in stats["recentCourses"]
+    ]
     
     # Sort by timestamp
     recent_activity.sort(key=lambda x: x["timestamp"], reverse=True)
     
     return {
-        "totalUsers": total_users,
-        "totalStudents": total_students,
-        "totalTeachers": total_teachers,
-        "totalCourses": total_courses,
-        "totalLessons": total_lessons,
-        "totalClassrooms": total_classrooms,
-        "activeUsers": active_users,
+        "totalUsers": stats["totalUsers"],
+        "totalStudents": stats["totalStudents"],
+        "totalTeachers": stats["totalTeachers"],
+        "totalCourses": stats["totalCourses"],
+        "totalLessons": stats["totalLessons"],
+        "totalClassrooms": stats["totalClassrooms"],
+        "activeUsers": stats["activeUsers"],
         "recentActivity": recent_activity[:5]
     }
 
+@router.get("/indexes")
+async def get_index_report(
+    current_user: User = Depends(require_admin),
+    db_service = Depends(get_db_service)
+):
+    # Explain every DatabaseService query shape and flag collection scans
+    report = await explain_query_shapes(db_service.db)
+    return {
+        "collscanCount": len([r for r in report if r["collscan"]]),
+        "queries": report
+    }
+
+@router.get("/performance")
+async def get_performance_stats(
+    current_user: User = Depends(require_admin),
+    db_service = Depends(get_db_service)
+):
+    # In-process cache and worker statistics for this API worker
+    return {
+        "userCache": user_cache.stats(),
+        "tokenVersionCache": token_versions.stats(),
+        "passwordHasher": password_hasher.stats(),
+        "catalogCache": catalog_cache.stats(),
+        "goRunner": go_runner.stats(),
+        "graderCache": grader_cache.stats(),
+        "dashboardSnapshot": dashboard_snapshot.stats(),
+        "courseAnalyticsSnapshot": course_analytics_snapshot.stats(),
+        "submissionQueue": await submission_queue.stats(db_service.db),
+        "submissionCommit": {**commit_counts, "latency": commit_latency.snapshot()}
+    }
+
 @router.get("/courses", response_model=List[CourseAnalytics])
 async def get_course_analytics(
     current_user: User = Depends(require_teacher_or_admin),
     db_service = Depends(get_db_service)
 ):
-    analytics = await db_service.get_course_analytics()
+    analytics = await course_analytics_snapshot.get(db_service.get_course_analytics)
     return analytics
 
 @router.get("/course/{course_id}")
@@ -84,33 +111,27 @@ async def get_course_detailed_analytics(
             detail="Course not found"
         )
     
-    # Get all progress for this course
-    progress_cursor = db_service.db.progress.find({"courseId": course_id})
-    all_progress = []
-    async for progress in progress_cursor:
-        all_progress.append(Progress(**progress))
-    
-    # Get course lessons
-    lessons = await db_service.get_lessons_by_course(course_id)
-    
-    # Calculate statistics
-    unique_students = set(p.userId for p in all_progress)
-    total_students = len(unique_students)
-    completed_progress = [p for p in all_progress if p.status == ProgressStatus.COMPLETED]
+    # Per-lesson counters are aggregated in the database
+    (total_students, progress_by_lesson), lessons = await asyncio.gather(
+        db_service.get_course_lesson_stats(course_id),
+        db_service.get_lesson_summaries_by_course(course_id)
+    )
+    total_completions = sum(stats["completions"] for stats in progress_by_lesson.values())
     
     # Lesson completion rates
     lesson_stats = []
     for lesson in lessons:
-        lesson_progress = [p for p in all_progress if p.lessonId == lesson.id]
-        lesson_completed = [p for p in lesson_progress if p.status == ProgressStatus.COMPLETED]
+        stats = progress_by_lesson.get(lesson.id)
+        attempts = stats["attempts"] if stats else 0
+        completions = stats["completions"] if stats else 0
         
         lesson_stats.append({
             "lessonId": lesson.id,
             "lessonTitle": lesson.title,
-            "totalAttempts": len(lesson_progress),
-            "completions": len(lesson_completed),
-            "completionRate": (len(lesson_completed) / len(lesson_progress) * 100) if lesson_progress else 0,
-            "averageScore": sum(p.score for p in lesson_completed) / len(lesson_completed) if lesson_completed else 0
+            "totalAttempts": attempts,
+            "completions": completions,
+            "completionRate": (completions / attempts * 100) if attempts else 0,
+            "averageScore": stats["completedScore"] / completions if completions else 0
         })
     
     return {
@@ -118,8 +139,8 @@ async def get_course_detailed_analytics(
         "courseName": course.title,
         "totalStudents": total_students,
         "totalLessons": len(lessons),
-        "totalCompletions": len(completed_progress),
-        "averageCompletion": (len(completed_progress) / (total_students * len(lessons)) * 100) if total_students and lessons else 0,
+        "totalCompletions": total_completions,
+        "averageCompletion": (total_completions / (total_students * len(lessons)) * 100) if total_students and lessons else 0,
         "lessonStats": lesson_stats
     }
 
@@ -144,33 +165,31 @@ async def get_student_analytics(
             detail="Student not found"
         )
     
-    # Get student progress
-    student_progress = await db_service.get_user_progress(student_id)
-    completed_lessons = [p for p in student_progress if p.status == ProgressStatus.COMPLETED]
-    
-    # Get achievements
-    achievements = await db_service.get_user_achievements(student_id)
-    
-    # Calculate study time
-    total_study_time = sum(p.timeSpent for p in student_progress)
+    # Per-course totals come from the progress rollups
+    rollups, achievement_count, recent_achievements, courses, lesson_counts = await asyncio.gather(
+        db_service.get_progress_rollups(student_id),
+        db_service.count_user_achievements(student_id),
+        db_service.get_recent_achievements(student_id, limit=5),
+        db_service.get_course_summaries(),
+        db_service.get_lesson_counts_by_course()
+    )
+    rollups_by_course = {rollup.courseId: rollup for rollup in rollups}
     
     # Course breakdown
-    courses = await db_service.get_courses()
     course_breakdown = []
     
     for course in courses:
-        course_progress = [p for p in student_progress if p.courseId == course.id]
-        course_completed = [p for p in course_progress if p.status == ProgressStatus.COMPLETED]
-        course_lessons = await db_service.get_lessons_by_course(course.id)
+        rollup = rollups_by_course.get(course.id)
+        course_lesson_count = lesson_counts.get(course.id, 0)
         
-        if course_progress:  # Only include courses where student has progress
+        if rollup and rollup.lessons:  # Only include courses where student has progress
             course_breakdown.append({
                 "courseId": course.id,
                 "courseName": course.title,
-                "totalLessons": len(course_lessons),
-                "completedLessons": len(course_completed),
-                "progressPercentage": (len(course_completed) / len(course_lessons) * 100) if course_lessons else 0,
-                "timeSpent": sum(p.timeSpent for p in course_progress)
+                "totalLessons": course_lesson_count,
+                "completedLessons": rollup.completed,
+                "progressPercentage": (rollup.completed / course_lesson_count * 100) if course_lesson_count else 0,
+                "timeSpent": rollup.timeSpent
             })
     
     return {
@@ -179,12 +198,12 @@ async def get_student_analytics(
         "totalXP": student.profile.totalXP,
         "level": student.profile.level,
         "streak": student.profile.streak,
-        "totalLessons": len(student_progress),
-        "completedLessons": len(completed_lessons),
-        "totalStudyTime": total_study_time,
-        "achievementCount": len(achievements),
+        "totalLessons": sum(rollup.lessons for rollup in rollups),
+        "completedLessons": sum(rollup.completed for rollup in rollups),
+        "totalStudyTime": sum(rollup.timeSpent for rollup in rollups),
+        "achievementCount": achievement_count,
         "courseBreakdown": course_breakdown,
-        "recentAchievements": achievements[:5]
+        "recentAchievements": recent_achievements
     }
 
 @router.get("/classroom/{classroom_id}")
@@ -202,7 +221,7 @@ async def get_classroom_analytics(
     
     # Check permissions
     if (current_user.role == UserRole.STUDENT and 
-        current_user.id not in classroom.students):
+        not await db_service.is_enrolled(classroom_id, current_user.id)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -212,7 +231,7 @@ async def get_classroom_analytics(
     progress_data = await db_service.get_classroom_progress(classroom_id)
     
     # Calculate classroom statistics
-    total_students = len(classroom.students)
+    total_students = classroom.studentCount
     active_students = len(progress_data)  # Students with any progress
     
     if progress_data:
@@ -1,6 +1,6 @@
 # Authentication routes
 from fastapi import APIRouter, Depends, HTTPException, status
-from dependencies import get_auth_service, get_db_service, get_current_user
+from dependencies import get_auth_service, get_db_service, get_current_user, require_admin
 from models import UserCreate, UserLogin, User, UserResponse, Token, UserRole
 from datetime import timedelta
 from typing import List
@@ -22,7 +22,7 @@ async def register(
         )
     
     # Create new user
-    hashed_password = auth_service.get_password_hash(user_create.password)
+    hashed_password = await auth_service.hash_password(user_create.password)
     new_user = User(
         **user_create.dict(exclude={"password"}),
         password=hashed_password
@@ -60,7 +60,7 @@ async def setup_admin(
         )
     
     # Create admin user
-    hashed_password = auth_service.get_password_hash(user_create.password)
+    hashed_password = await auth_service.hash_password(user_create.password)
     admin_user = User(
         email=user_create.email,
         password=hashed_password,
@@ -86,8 +86,8 @@ async def login(
         )
     
     access_token_expires = timedelta(minutes=60 * 24 * 7)  # 7 days
-    access_token = auth_service.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+    access_token = await auth_service.create_user_token(
+        user, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -111,10 +111,7 @@ async def update_current_user(
     
     if update_data:
         # Update user in database
-        await db_service.db.users.update_one(
-            {"id": current_user.id},
-            {"$set": update_data}
-        )
+        await db_service.update_user(current_user.id, update_data)
         
         # Get updated user
         updated_user = await db_service.get_user_by_id(current_user.id)
@@ -132,18 +129,22 @@ async def logout():
 async def get_all_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(require_admin),
     db_service = Depends(get_db_service)
 ):
-    if current_user.role != UserRole.ADMIN:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Admin access required"
-        )
-    
     users_cursor = db_service.db.users.find().skip(skip).limit(limit)
     users = []
     async for user_data in users_cursor:
         users.append(UserResponse(**User(**user_data).dict()))
     
-    return users
\ No newline at end of file
+    return users
+
+@router.post("/users/{user_id}/revoke-tokens")
+async def revoke_user_tokens(
+    user_id: str,
+    current_user: User = Depends(require_admin),
+    auth_service = Depends(get_auth_service)
+):
+    # Invalidates every claims-mode token issued to the user
+    version = await auth_service.revoke_user_tokens(user_id)
+    return {"message": "Tokens revoked", "version": version}
\ No newline at end of file
@@ -1,11 +1,18 @@
 # Classroom management routes
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from dependencies import get_current_user, require_teacher_or_admin, get_db_service
 from models import *
 from typing import List, Dict, Any
+import csv
+import io
+import os
 
 router = APIRouter(prefix="/classrooms", tags=["classrooms"])
 
+ROSTER_IMPORT_MAX_EMAILS = int(os.getenv("ROSTER_IMPORT_MAX_EMAILS", "1000"))
+ROSTER_STREAM_BATCH_SIZE = int(os.getenv("ROSTER_STREAM_BATCH_SIZE", "500"))
+
 @router.get("/", response_model=List[ClassroomResponse])
 async def get_my_classrooms(
     current_user: User = Depends(get_current_user),
@@ -16,10 +23,7 @@ async def get_my_classrooms(
         classrooms = await db_service.get_classrooms_by_teacher(current_user.id)
     else:
         # Students see classrooms they're enrolled in
-        classrooms_cursor = db_service.db.classrooms.find({"students": current_user.id})
-        classrooms = []
-        async for classroom_data in classrooms_cursor:
-            classrooms.append(Classroom(**classroom_data))
+        classrooms = await db_service.get_student_classrooms(current_user.id)
     
     # Convert to response format
     response_classrooms = []
@@ -29,7 +33,7 @@ async def get_my_classrooms(
             name=classroom.name,
             description=classroom.description,
             teacherId=classroom.teacherId,
-            students=len(classroom.students),
+            students=classroom.studentCount,
             maxStudents=classroom.maxStudents,
             courses=len(classroom.courseIds),
             inviteCode=classroom.inviteCode,
@@ -54,7 +58,7 @@ async def get_classroom(
     
     # Check access permissions
     if (current_user.role == UserRole.STUDENT and 
-        current_user.id not in classroom.students):
+        not await db_service.is_enrolled(classroom_id, current_user.id)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
@@ -130,9 +134,9 @@ async def delete_classroom(
             detail="Access denied"
         )
     
-    result = await db_service.db.classrooms.delete_one({"id": classroom_id})
+    success = await db_service.delete_classroom(classroom_id)
     
-    if result.deleted_count == 0:
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Failed to delete classroom"
@@ -159,14 +163,14 @@ async def join_classroom_by_id(
             detail="Classroom not found"
         )
     
-    if len(classroom.students) >= classroom.maxStudents:
+    # Capacity is enforced atomically by the update itself
+    already = await db_service.enroll_students(classroom_id, [current_user.id])
+    if already is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Classroom is full"
         )
-    
-    success = await db_service.join_classroom(classroom_id, current_user.id)
-    if not success:
+    if already:
         return {"message": "Already enrolled in classroom"}
     
     return {"message": "Successfully joined classroom"}
@@ -190,18 +194,119 @@ async def join_classroom_by_code(
             detail="Invalid invite code"
         )
     
-    if len(classroom.students) >= classroom.maxStudents:
+    # Capacity is enforced atomically by the update itself
+    already = await db_service.enroll_students(classroom.id, [current_user.id])
+    if already is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Classroom is full"
         )
-    
-    success = await db_service.join_classroom(classroom.id, current_user.id)
-    if not success:
+    if already:
         return {"message": "Already enrolled in classroom"}
     
     return {"message": f"Successfully joined {classroom.name}"}
 
+async def import_roster(
+    classroom_id: str,
+    emails: List[str],
+    current_user: User,
+    db_service
+) -> RosterImportResult:
+    classroom = await db_service.get_classroom_by_id(classroom_id)
+    if not classroom:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Classroom not found"
+        )
+    
+    # Check permissions
+    if (current_user.role != UserRole.ADMIN and 
+        classroom.teacherId != current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    # Drop blanks and duplicates, keeping the roster order
+    unique_emails = {}
+    for email in emails:
+        email = email.strip()
+        if email:
+            unique_emails.setdefault(email.lower(), email)
+    if len(unique_emails) > ROSTER_IMPORT_MAX_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {ROSTER_IMPORT_MAX_EMAILS} emails per import"
+        )
+    
+    result = RosterImportResult(students=classroom.studentCount, maxStudents=classroom.maxStudents)
+    users = await db_service.get_users_by_emails(list(unique_emails.values()))
+    
+    student_emails = {}
+    for key, email in unique_emails.items():
+        user = users.get(key)
+        if not user:
+            result.notFound.append(email)
+        elif user["role"] != UserRole.STUDENT:
+            result.notStudents.append(email)
+        else:
+            student_emails[user["id"]] = email
+    
+    if not student_emails:
+        return result
+    
+    already = await db_service.enroll_students(classroom_id, list(student_emails))
+    if already is None:
+        seats = max(classroom.maxStudents - classroom.studentCount, 0)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Classroom is full (free seats: {seats}), nothing was imported"
+        )
+    
+    for student_id, email in student_emails.items():
+        if student_id in already:
+            result.alreadyEnrolled.append(email)
+        else:
+            result.enrolled.append(email)
+    result.students = classroom.studentCount + len(result.enrolled)
+    return result
+
+@router.post("/{classroom_id}/roster", response_model=RosterImportResult)
+async def import_roster_json(
+    classroom_id: str,
+    roster_import: RosterImport,
+    current_user: User = Depends(require_teacher_or_admin),
+    db_service = Depends(get_db_service)
+):
+    return await import_roster(classroom_id, roster_import.emails, current_user, db_service)
+
+@router.post("/{classroom_id}/roster/csv", response_model=RosterImportResult)
+async def import_roster_csv(
+    classroom_id: str,
+    file: UploadFile = File(...),
+    current_user: User = Depends(require_teacher_or_admin),
+    db_service = Depends(get_db_service)
+):
+    try:
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must be UTF-8 encoded"
+        )
+    
+    # Use the "email" column if there is a header row, otherwise the first column
+    rows = [row for row in csv.reader(io.StringIO(text)) if row]
+    column = 0
+    if rows:
+        header = [cell.strip().lower() for cell in rows[0]]
+        if "email" in header:
+            column = header.index("email")
+            rows = rows[1:]
+    emails = [row[column] for row in rows if len(row) > column]
+    
+    return await import_roster(classroom_id, emails, current_user, db_service)
+
 @router.delete("/{classroom_id}/leave")
 async def leave_classroom(
     classroom_id: str,
@@ -227,6 +332,10 @@ async def leave_classroom(
 @router.get("/{classroom_id}/students", response_model=List[UserResponse])
 async def get_classroom_students(
     classroom_id: str,
+    response: Response,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    stream: bool = False,
     current_user: User = Depends(get_current_user),
     db_service = Depends(get_db_service)
 ):
@@ -239,20 +348,32 @@ async def get_classroom_students(
     
     # Check permissions
     if (current_user.role == UserRole.STUDENT and 
-        current_user.id not in classroom.students):
+        not await db_service.is_enrolled(classroom_id, current_user.id)):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    # Get student details
-    students = []
-    for student_id in classroom.students:
-        student = await db_service.get_user_by_id(student_id)
-        if student:
-            students.append(UserResponse(**student.dict()))
+    # Page through the roster in its own order; X-Total-Count is the roster size
+    if skip < 0 or (limit is not None and limit < 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="skip and limit must not be negative"
+        )
+    student_ids = await db_service.get_classroom_student_ids(classroom_id, skip, limit)
+    headers = {"X-Total-Count": str(classroom.studentCount)}
+    
+    if stream:
+        # NDJSON, one $in query per batch, so memory stays flat for large rosters
+        async def lines():
+            for start in range(0, len(student_ids), ROSTER_STREAM_BATCH_SIZE):
+                batch = await db_service.get_users_by_ids(student_ids[start:start + ROSTER_STREAM_BATCH_SIZE])
+                yield "".join(student.json() + "\n" for student in batch)
+        
+        return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
     
-    return students
+    response.headers.update(headers)
+    return await db_service.get_users_by_ids(student_ids)
 
 @router.get("/{classroom_id}/progress")
 async def get_classroom_progress(
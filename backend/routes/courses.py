@@ -1,6 +1,7 @@
 # Course management routes
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from dependencies import get_current_user, require_admin, get_db_service
+from http_cache import CATALOG_CACHE_CONTROL, make_etag, is_not_modified, not_modified, set_validators
 from models import *
 from typing import List, Optional
 
@@ -8,46 +9,91 @@ router = APIRouter(prefix="/courses", tags=["courses"])
 
 @router.get("/", response_model=List[Course])
 async def get_courses(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     db_service = Depends(get_db_service)
 ):
+    etag = make_etag("courses", await db_service.get_catalog_version(), skip, limit)
+    if is_not_modified(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    set_validators(response, etag, CATALOG_CACHE_CONTROL)
+    
     courses = await db_service.get_courses(skip=skip, limit=limit)
     return courses
 
 @router.get("/{course_id}", response_model=CourseWithLessons)
 async def get_course(
     course_id: str,
+    request: Request,
+    response: Response,
     db_service = Depends(get_db_service)
 ):
+    etag = make_etag("course-public", await db_service.get_catalog_version(), course_id)
     course = await db_service.get_course_by_id(course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
+    if is_not_modified(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
     
-    # Get lessons for the course
+    # Get lessons for the course; solutions and test cases are left out
     lessons = await db_service.get_lessons_by_course(course_id)
     
+    set_validators(response, etag, CATALOG_CACHE_CONTROL)
     return CourseWithLessons(
-        **course.dict(),
+        **course.dict(exclude={"lessons"}),
+        lessons=[lesson.dict() for lesson in lessons]
+    )
+
+@router.get("/{course_id}/outline", response_model=CourseWithLessonSummaries)
+async def get_course_outline(
+    course_id: str,
+    request: Request,
+    response: Response,
+    db_service = Depends(get_db_service)
+):
+    # Lesson headers only - content and challenges are fetched per lesson
+    etag = make_etag("outline", await db_service.get_catalog_version(), course_id)
+    course = await db_service.get_course_by_id(course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    if is_not_modified(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
+    
+    lessons = await db_service.get_lesson_summaries_by_course(course_id)
+    
+    set_validators(response, etag, CATALOG_CACHE_CONTROL)
+    return CourseWithLessonSummaries(
+        **course.dict(exclude={"lessons"}),
         lessons=lessons
     )
 
-@router.get("/{course_id}/lessons", response_model=List[Lesson])
+@router.get("/{course_id}/lessons", response_model=List[PublicLesson])
 async def get_course_lessons(
     course_id: str,
+    request: Request,
+    response: Response,
     db_service = Depends(get_db_service)
 ):
+    etag = make_etag("lessons-public", await db_service.get_catalog_version(), course_id)
     course = await db_service.get_course_by_id(course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
+    if is_not_modified(request, etag):
+        return not_modified(etag, CATALOG_CACHE_CONTROL)
     
     lessons = await db_service.get_lessons_by_course(course_id)
+    set_validators(response, etag, CATALOG_CACHE_CONTROL)
     return lessons
 
 # Admin routes for course management
@@ -125,8 +171,7 @@ async def reorder_course_lessons(
             detail="Course not found"
         )
     
-    # Update lesson orders
-    for index, lesson_id in enumerate(lesson_ids):
-        await db_service.update_lesson(lesson_id, LessonUpdate(order=index + 1))
+    # Update lesson orders in one bulk write
+    await db_service.reorder_lessons(course_id, lesson_ids)
     
     return {"message": "Lessons reordered successfully"}
\ No newline at end of file
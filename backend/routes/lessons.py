@@ -1,14 +1,18 @@
 # Lesson management routes
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
 from dependencies import get_current_user, require_admin, get_db_service
+from http_cache import LESSON_CACHE_CONTROL, make_etag, is_not_modified, not_modified, set_validators
+from submission_queue import submission_queue, QueueFull
 from models import *
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/lessons", tags=["lessons"])
 
 @router.get("/{lesson_id}", response_model=Lesson)
 async def get_lesson(
     lesson_id: str,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db_service = Depends(get_db_service)
 ):
@@ -19,12 +23,18 @@ async def get_lesson(
             detail="Lesson not found"
         )
     
+    etag = make_etag("lesson", lesson.id, lesson.updatedAt.isoformat())
+    if is_not_modified(request, etag):
+        return not_modified(etag, LESSON_CACHE_CONTROL)
+    set_validators(response, etag, LESSON_CACHE_CONTROL)
+    
     return lesson
 
-@router.post("/{lesson_id}/submit", response_model=CodeSubmissionResult)
+@router.post("/{lesson_id}/submit", response_model=SubmissionJob, status_code=status.HTTP_202_ACCEPTED)
 async def submit_code(
     lesson_id: str,
     submission: CodeSubmission,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: User = Depends(get_current_user),
     db_service = Depends(get_db_service)
 ):
@@ -41,62 +51,23 @@ async def submit_code(
             detail="This lesson does not have a coding challenge"
         )
     
-    # Simple code evaluation (in production, use sandboxed execution)
-    success = False
-    output = ""
-    tests_pass = False
-    score = 0
-    
+    # Grading happens in the submission workers; poll or stream
+    # /submissions/{id} for the result
+    job = SubmissionJob(
+        userId=current_user.id,
+        lessonId=lesson_id,
+        courseId=lesson.courseId,
+        code=submission.code,
+        idempotencyKey=idempotency_key
+    )
     try:
-        # Basic validation - check if code contains expected elements
-        code = submission.code.lower()
-        challenge = lesson.codingChallenge
-        
-        if lesson_id == "1":  # Hello World challenge
-            if "fmt.println" in code and "hello, world!" in code:
-                success = True
-                output = "Hello, World!"
-                tests_pass = True
-                score = challenge.points
-            else:
-                output = "Code does not produce expected output"
-        elif "return" in code and ("+" in code or "add" in code):
-            success = True
-            output = "8"  # Simple calculator result
-            tests_pass = True
-            score = challenge.points
-        else:
-            output = "Code compilation failed or incorrect implementation"
-    
-    except Exception as e:
-        output = f"Error: {str(e)}"
-    
-    # Update progress if successful
-    if tests_pass:
-        progress_create = ProgressCreate(
-            lessonId=lesson_id,
-            courseId=lesson.courseId
-        )
-        progress = await db_service.create_or_update_progress(current_user.id, progress_create)
-        
-        progress_update = ProgressUpdate(
-            status=ProgressStatus.COMPLETED,
-            score=score
-        )
-        await db_service.update_progress(progress.id, progress_update)
-        
-        # Award XP to user
-        await db_service.update_user_profile(
-            current_user.id,
-            {"totalXP": current_user.profile.totalXP + score}
+        return await submission_queue.enqueue(db_service.db, job)
+    except QueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many submissions are waiting to be graded, try again shortly",
+            headers={"Retry-After": "5"}
         )
-    
-    return CodeSubmissionResult(
-        success=success,
-        output=output,
-        testsPass=tests_pass,
-        score=score
-    )
 
 # Admin routes for lesson management
 @router.post("/", response_model=Lesson)
@@ -1,26 +1,29 @@
 # Progress tracking routes
 from fastapi import APIRouter, Depends, HTTPException, status
-from dependencies import get_current_user, get_db_service
+from dependencies import get_current_user, get_token_claims, get_db_service
 from models import *
 from typing import List, Dict, Any
+import os
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
+PROGRESS_BATCH_MAX_EVENTS = int(os.getenv("PROGRESS_BATCH_MAX_EVENTS", "1000"))
+
 @router.get("/me", response_model=List[Progress])
 async def get_my_progress(
-    current_user: User = Depends(get_current_user),
+    claims: TokenData = Depends(get_token_claims),
     db_service = Depends(get_db_service)
 ):
-    progress = await db_service.get_user_progress(current_user.id)
+    progress = await db_service.get_user_progress(claims.userId)
     return progress
 
 @router.get("/me/course/{course_id}", response_model=List[Progress])
 async def get_my_course_progress(
     course_id: str,
-    current_user: User = Depends(get_current_user),
+    claims: TokenData = Depends(get_token_claims),
     db_service = Depends(get_db_service)
 ):
-    progress = await db_service.get_course_progress(current_user.id, course_id)
+    progress = await db_service.get_course_progress(claims.userId, course_id)
     return progress
 
 @router.post("/", response_model=Progress)
@@ -40,6 +43,35 @@ async def create_progress(
     progress = await db_service.create_or_update_progress(current_user.id, progress_create)
     return progress
 
+@router.post("/batch", response_model=ProgressBatchResult)
+async def create_progress_batch(
+    batch: ProgressBatch,
+    claims: TokenData = Depends(get_token_claims),
+    db_service = Depends(get_db_service)
+):
+    # Offline clients sync many lesson events at once
+    if len(batch.events) > PROGRESS_BATCH_MAX_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {PROGRESS_BATCH_MAX_EVENTS} events per batch"
+        )
+    
+    # Verify all lessons exist with a single query
+    course_ids = await db_service.get_lesson_course_ids(list({event.lessonId for event in batch.events}))
+    valid_events = [event for event in batch.events if event.lessonId in course_ids]
+    outcomes = await db_service.apply_progress_events(claims.userId, valid_events, course_ids) if valid_events else {}
+    
+    results = []
+    for index, event in enumerate(batch.events):
+        if event.lessonId not in course_ids:
+            results.append(ProgressEventResult(index=index, lessonId=event.lessonId, ok=False, error="Lesson not found"))
+            continue
+        progress_id, error = outcomes[event.lessonId]
+        results.append(ProgressEventResult(index=index, lessonId=event.lessonId, ok=error is None, progressId=progress_id, error=error))
+    
+    applied = len([r for r in results if r.ok])
+    return ProgressBatchResult(applied=applied, failed=len(results) - applied, results=results)
+
 @router.put("/{progress_id}", response_model=Progress)
 async def update_progress(
     progress_id: str,
@@ -80,12 +112,12 @@ async def get_progress_dashboard(
     current_user: User = Depends(get_current_user),
     db_service = Depends(get_db_service)
 ):
-    # Get user's progress summary
-    user_progress = await db_service.get_user_progress(current_user.id)
+    data = await db_service.get_progress_dashboard_data(current_user.id)
+    progress_stats = data["progressStats"]
     
     # Calculate stats
-    total_lessons = len(user_progress)
-    completed_lessons = len([p for p in user_progress if p.status == ProgressStatus.COMPLETED])
+    total_lessons = sum(stats["total"] for stats in progress_stats.values())
+    completed_lessons = sum(stats["completed"] for stats in progress_stats.values())
     total_xp = current_user.profile.totalXP
     streak = current_user.profile.streak
     
@@ -93,26 +125,20 @@ async def get_progress_dashboard(
     progress_percentage = int((completed_lessons / total_lessons * 100)) if total_lessons > 0 else 0
     
     # Get course progress
-    courses = await db_service.get_courses()
     course_progress = []
     
-    for course in courses:
-        course_lessons = await db_service.get_lessons_by_course(course.id)
-        course_user_progress = [p for p in user_progress if p.courseId == course.id]
-        completed_course_lessons = len([p for p in course_user_progress if p.status == ProgressStatus.COMPLETED])
+    for course in data["courses"]:
+        course_lesson_count = data["lessonCounts"].get(course.id, 0)
+        completed_course_lessons = progress_stats.get(course.id, {}).get("completed", 0)
         
         course_progress.append({
             "courseId": course.id,
             "courseName": course.title,
-            "totalLessons": len(course_lessons),
+            "totalLessons": course_lesson_count,
             "completedLessons": completed_course_lessons,
-            "progressPercentage": int((completed_course_lessons / len(course_lessons) * 100)) if course_lessons else 0
+            "progressPercentage": int((completed_course_lessons / course_lesson_count * 100)) if course_lesson_count else 0
         })
     
-    # Get recent achievements
-    achievements = await db_service.get_user_achievements(current_user.id)
-    recent_achievements = achievements[:3]  # Last 3 achievements
-    
     return {
         "totalProgress": progress_percentage,
         "completedLessons": completed_lessons,
@@ -129,6 +155,6 @@ async def get_progress_dashboard(
                 "icon": ach.icon,
                 "earnedAt": ach.earnedAt,
                 "points": ach.points
-            } for ach in recent_achievements
+            } for ach in data["recentAchievements"]
         ]
     }
\ No newline at end of file
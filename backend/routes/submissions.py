@@ -0,0 +1,61 @@
+# Code submission job routes
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from dependencies import get_token_claims, get_db_service
+from submission_queue import submission_queue, FINISHED_STATUSES
+from models import *
+import time
+
+router = APIRouter(prefix="/submissions", tags=["submissions"])
+
+# Comment line sent on idle streams so dead clients are noticed
+STREAM_KEEPALIVE_SECONDS = 15
+
+async def _get_visible_job(job_id: str, claims: TokenData, db_service) -> SubmissionJob:
+    job = await submission_queue.get(db_service.db, job_id)
+    if not job or (job.userId != claims.userId and claims.role != UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found"
+        )
+    return job
+
+@router.get("/{job_id}", response_model=SubmissionJob)
+async def get_submission(
+    job_id: str,
+    claims: TokenData = Depends(get_token_claims),
+    db_service = Depends(get_db_service)
+):
+    return await _get_visible_job(job_id, claims, db_service)
+
+@router.get("/{job_id}/events")
+async def stream_submission(
+    job_id: str,
+    claims: TokenData = Depends(get_token_claims),
+    db_service = Depends(get_db_service)
+):
+    # Server-sent events: one event per status change, closed once finished
+    job = await _get_visible_job(job_id, claims, db_service)
+
+    async def events():
+        current = job
+        last_status = None
+        last_sent = time.monotonic()
+        while current is not None:
+            if current.status != last_status:
+                last_status = current.status
+                last_sent = time.monotonic()
+                yield f"event: {current.status.value}\ndata: {current.json()}\n\n"
+            elif time.monotonic() - last_sent >= STREAM_KEEPALIVE_SECONDS:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            if current.status in FINISHED_STATUSES:
+                return
+            await submission_queue.wait_for_change(job_id, submission_queue.poll_seconds)
+            current = await submission_queue.get(db_service.db, job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -4,6 +4,7 @@ from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from typing import List, Optional
@@ -14,9 +15,14 @@ from models import *
 from auth import AuthService, get_current_user, require_admin, require_teacher_or_admin
 from database import DatabaseService
 from data_seeder import seed_initial_data
+from indexes import ensure_indexes
+from progress_rollups import ensure_rollups
+from password_hasher import password_hasher
+from go_runner import go_runner
+from submission_queue import submission_queue
 
 # Import route modules
-from routes import auth, courses, lessons, classrooms, progress, achievements, analytics
+from routes import auth, courses, lessons, classrooms, progress, achievements, analytics, submissions
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -36,10 +42,16 @@ api_router = APIRouter(prefix="/api")
 auth_service = AuthService(db)
 db_service = DatabaseService(db)
 
-# Startup event to seed database
+# Startup event to create indexes and seed database
 @app.on_event("startup")
 async def startup_event():
+    await ensure_indexes(db)
+    # Databases from before the progress rollups are backfilled once
+    await ensure_rollups(db)
     await seed_initial_data(db_service, auth_service)
+    # Pre-warm the Go build cache without delaying startup
+    asyncio.create_task(go_runner.warm_up())
+    submission_queue.start_workers(db)
 
 # Dependency to get database
 async def get_database():
@@ -88,6 +100,7 @@ api_router.include_router(classrooms.router)
 api_router.include_router(progress.router)
 api_router.include_router(achievements.router)
 api_router.include_router(analytics.router)
+api_router.include_router(submissions.router)
 
 # Include the main router in the app
 app.include_router(api_router)
@@ -109,7 +122,10 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await submission_queue.stop_workers()
+    go_runner.shutdown()
     client.close()
+    password_hasher.shutdown()
 
 app.add_middleware(
     CORSMiddleware,
@@ -129,3 +145,4 @@ logger = logging.getLogger(__name__)
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    password_hasher.shutdown()
@@ -0,0 +1,366 @@
+# Asynchronous grading queue for code submissions
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+from models import SubmissionJob, SubmissionStatus
+from database import DatabaseService
+from go_runner import go_runner, GRADER_WORKERS
+from progress_rollups import ensure_rollups
+from metrics import LatencyRecorder
+import asyncio
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# "mongo" shares jobs between API processes and standalone workers;
+# "memory" keeps them inside this process (single process deployments)
+SUBMISSION_QUEUE_BACKEND = os.getenv("SUBMISSION_QUEUE_BACKEND", "mongo").lower()
+# Queued jobs allowed before new submissions are rejected with 503
+SUBMISSION_QUEUE_MAX_DEPTH = int(os.getenv("SUBMISSION_QUEUE_MAX_DEPTH", "200"))
+# Grading workers started inside the API process, one per grader workspace
+# by default. 0 leaves grading to standalone `python submission_queue.py`
+# workers (mongo backend only)
+SUBMISSION_WORKERS = int(os.getenv("SUBMISSION_WORKERS", str(GRADER_WORKERS)))
+SUBMISSION_POLL_SECONDS = float(os.getenv("SUBMISSION_POLL_SECONDS", "0.5"))
+# A running job whose worker died is handed out again once its lease
+# expires; live workers renew it every third of this
+SUBMISSION_LEASE_SECONDS = float(os.getenv("SUBMISSION_LEASE_SECONDS", "120"))
+SUBMISSION_MAX_ATTEMPTS = int(os.getenv("SUBMISSION_MAX_ATTEMPTS", "3"))
+
+FINISHED_STATUSES = (SubmissionStatus.COMPLETED, SubmissionStatus.FAILED)
+# Finished jobs kept by the memory backend (mongo expires them by TTL index)
+MEMORY_FINISHED_JOBS = 10000
+
+class QueueFull(Exception):
+    pass
+
+class SubmissionQueue:
+    """Queue of grading jobs with leased claims.
+
+    Workers claim the oldest queued job (or one whose lease expired), grade
+    it and store the result on the job. The lease is renewed while the job
+    runs, and a worker that lost it (the job was handed out again) no longer
+    updates the job. Progress and XP are committed before the job is
+    finished and the commit is idempotent per job id, so a job requeued
+    after a failed commit or a worker crash is committed exactly once.
+    """
+
+    def __init__(
+        self,
+        backend: str = SUBMISSION_QUEUE_BACKEND,
+        max_depth: int = SUBMISSION_QUEUE_MAX_DEPTH,
+        poll_seconds: float = SUBMISSION_POLL_SECONDS,
+        lease_seconds: float = SUBMISSION_LEASE_SECONDS,
+        max_attempts: int = SUBMISSION_MAX_ATTEMPTS
+    ):
+        self.backend = backend
+        self.max_depth = max_depth
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Memory backend state
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._ready: Deque[str] = deque()
+        self._keys: Dict[tuple, str] = {}
+        self._finished: Deque[str] = deque()
+        # Local wake-ups; other processes are noticed by polling
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._workers: List[asyncio.Task] = []
+        self.enqueued = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.wait_latency = LatencyRecorder()
+        self.grade_latency = LatencyRecorder()
+
+    @property
+    def uses_mongo(self) -> bool:
+        return self.backend != "memory"
+
+    async def depth(self, db: AsyncIOMotorDatabase) -> int:
+        if not self.uses_mongo:
+            return len(self._ready)
+        return await db.submissions.count_documents({"status": SubmissionStatus.QUEUED})
+
+    async def enqueue(self, db: AsyncIOMotorDatabase, job: SubmissionJob) -> SubmissionJob:
+        # A retried request with the same idempotency key gets the original job
+        existing = await self._find_by_key(db, job)
+        if existing:
+            return existing
+
+        if await self.depth(db) >= self.max_depth:
+            self.rejected += 1
+            raise QueueFull()
+
+        if self.uses_mongo:
+            try:
+                await db.submissions.insert_one(job.dict())
+            except DuplicateKeyError:
+                return await self._find_by_key(db, job)
+        else:
+            self._jobs[job.id] = job.dict()
+            self._ready.append(job.id)
+            if job.idempotencyKey:
+                self._keys[(job.userId, job.idempotencyKey)] = job.id
+
+        self.enqueued += 1
+        self._wake_workers()
+        return job
+
+    async def _find_by_key(self, db: AsyncIOMotorDatabase, job: SubmissionJob) -> Optional[SubmissionJob]:
+        if not job.idempotencyKey:
+            return None
+        if self.uses_mongo:
+            doc = await db.submissions.find_one(
+                {"userId": job.userId, "idempotencyKey": job.idempotencyKey},
+                {"_id": 0}
+            )
+        else:
+            job_id = self._keys.get((job.userId, job.idempotencyKey))
+            doc = self._jobs.get(job_id) if job_id else None
+        return SubmissionJob(**doc) if doc else None
+
+    async def get(self, db: AsyncIOMotorDatabase, job_id: str) -> Optional[SubmissionJob]:
+        if self.uses_mongo:
+            doc = await db.submissions.find_one({"id": job_id}, {"_id": 0})
+        else:
+            doc = self._jobs.get(job_id)
+        return SubmissionJob(**doc) if doc else None
+
+    async def wait_for_change(self, job_id: str, timeout: float):
+        """Wait until this process updates the job, or `timeout` elapses."""
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            if self._changed.get(job_id) is event:
+                del self._changed[job_id]
+
+    def _notify(self, job_id: str):
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    def _wake_workers(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _claim(self, db: AsyncIOMotorDatabase, worker_id: str) -> Optional[SubmissionJob]:
+        now = datetime.utcnow()
+        claim = {
+            "status": SubmissionStatus.RUNNING,
+            "startedAt": now,
+            "leaseUntil": now + timedelta(seconds=self.lease_seconds),
+            "workerId": worker_id
+        }
+        if self.uses_mongo:
+            doc = await db.submissions.find_one_and_update(
+                {"$or": [
+                    {"status": SubmissionStatus.QUEUED},
+                    {"status": SubmissionStatus.RUNNING, "leaseUntil": {"$lt": now}}
+                ]},
+                {"$set": claim, "$inc": {"attempts": 1}},
+                sort=[("createdAt", 1)],
+                projection={"_id": 0}
+            )
+            if doc is None:
+                return None
+        else:
+            if not self._ready:
+                return None
+            doc = self._jobs[self._ready.popleft()]
+
+        # Apply the claim to the pre-update document
+        doc.update(claim)
+        doc["attempts"] += 1
+        self._notify(doc["id"])
+        return SubmissionJob(**doc)
+
+    async def _renew_lease(self, db: AsyncIOMotorDatabase, job_id: str, worker_id: str):
+        # Runs alongside the job, so waiting for a workspace or a slow grade
+        # does not make the job look abandoned
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                result = await db.submissions.update_one(
+                    {"id": job_id, "workerId": worker_id, "status": SubmissionStatus.RUNNING},
+                    {"$set": {"leaseUntil": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except PyMongoError:
+                logger.warning("Could not renew the lease of submission %s", job_id)
+                continue
+            if result.matched_count == 0:
+                return
+
+    async def _update(self, db: AsyncIOMotorDatabase, job_id: str, fields: Dict[str, Any], worker_id: Optional[str] = None) -> bool:
+        # With a worker id only the worker holding the job may update it.
+        # Returns whether the job was updated
+        if self.uses_mongo:
+            query = {"id": job_id, "workerId": worker_id} if worker_id else {"id": job_id}
+            result = await db.submissions.update_one(query, {"$set": fields, "$unset": {"leaseUntil": ""}})
+            if result.matched_count == 0:
+                logger.warning("Submission %s was handed to another worker; dropping this update", job_id)
+                return False
+        else:
+            self._jobs[job_id].update(fields)
+            self._jobs[job_id].pop("leaseUntil", None)
+        self._notify(job_id)
+        return True
+
+    async def _finish(self, db: AsyncIOMotorDatabase, job_id: str, status: SubmissionStatus, worker_id: Optional[str] = None, **fields):
+        if not await self._update(db, job_id, {"status": status, "finishedAt": datetime.utcnow(), **fields}, worker_id):
+            return
+        if not self.uses_mongo:
+            self._retain_finished(job_id)
+        if status == SubmissionStatus.COMPLETED:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+    def _retain_finished(self, job_id: str):
+        self._finished.append(job_id)
+        while len(self._finished) > MEMORY_FINISHED_JOBS:
+            doc = self._jobs.pop(self._finished.popleft(), None)
+            if doc and doc.get("idempotencyKey"):
+                self._keys.pop((doc["userId"], doc["idempotencyKey"]), None)
+
+    async def _retry_or_fail(self, db: AsyncIOMotorDatabase, job: SubmissionJob, error: str, worker_id: Optional[str] = None):
+        if job.attempts >= self.max_attempts:
+            await self._finish(db, job.id, SubmissionStatus.FAILED, worker_id, error=error)
+            return
+        if not await self._update(db, job.id, {"status": SubmissionStatus.QUEUED, "error": error}, worker_id):
+            return
+        self.retried += 1
+        if not self.uses_mongo:
+            self._ready.append(job.id)
+        self._wake_workers()
+
+    async def process(self, db: AsyncIOMotorDatabase, job: SubmissionJob, worker_id: Optional[str] = None):
+        if job.attempts > self.max_attempts:
+            # Its worker kept dying; do not hand it out again
+            await self._finish(db, job.id, SubmissionStatus.FAILED, worker_id, error="Grading failed repeatedly")
+            return
+        if job.attempts == 1:
+            self.wait_latency.record((job.startedAt - job.createdAt).total_seconds())
+
+        db_service = DatabaseService(db)
+        lesson = await db_service.get_lesson_by_id(job.lessonId)
+        if not lesson or not lesson.codingChallenge:
+            await self._finish(db, job.id, SubmissionStatus.FAILED, worker_id, error="This lesson does not have a coding challenge")
+            return
+
+        started = time.perf_counter()
+        try:
+            result = await go_runner.grade(lesson.codingChallenge, job.code, lesson_id=lesson.id)
+        except RuntimeError as e:
+            # No toolchain on this worker - retrying here will not help
+            await self._finish(db, job.id, SubmissionStatus.FAILED, worker_id, error=f"Code execution is not available: {e}")
+            return
+        self.grade_latency.record(time.perf_counter() - started)
+
+        if result.testsPass:
+            await db_service.commit_submission(job.userId, job.lessonId, job.courseId, result.score, job_id=job.id)
+        await self._finish(db, job.id, SubmissionStatus.COMPLETED, worker_id, result=result.dict(), committed=result.testsPass)
+
+    async def _worker(self, db: AsyncIOMotorDatabase, worker_id: str):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        while True:
+            job = None
+            try:
+                job = await self._claim(db, worker_id)
+                if job is not None:
+                    renewal = asyncio.create_task(self._renew_lease(db, job.id, worker_id)) if self.uses_mongo else None
+                    try:
+                        await self.process(db, job, worker_id)
+                    finally:
+                        if renewal is not None:
+                            renewal.cancel()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Submission worker %s failed", worker_id)
+                if job is not None:
+                    try:
+                        await self._retry_or_fail(db, job, f"Internal grading error: {e.__class__.__name__}", worker_id)
+                    except Exception:
+                        # Leave it to the lease expiry
+                        logger.exception("Could not requeue submission %s", job.id)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start_workers(self, db: AsyncIOMotorDatabase, count: int = SUBMISSION_WORKERS):
+        if count <= 0 and not self.uses_mongo:
+            logger.warning("Memory submission queue needs in-process workers; starting one")
+            count = 1
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for index in range(count):
+            self._workers.append(asyncio.create_task(self._worker(db, f"{prefix}:{index}")))
+
+    async def stop_workers(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def stats(self, db: AsyncIOMotorDatabase) -> dict:
+        return {
+            "backend": "mongo" if self.uses_mongo else "memory",
+            "workers": len(self._workers),
+            "depth": await self.depth(db),
+            "maxDepth": self.max_depth,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "queueWait": self.wait_latency.snapshot(),
+            "gradeTime": self.grade_latency.snapshot()
+        }
+
+# Shared by every request handler and worker in this process
+submission_queue = SubmissionQueue()
+
+async def _main():
+    import argparse
+    from pathlib import Path
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Standalone grading worker")
+    parser.add_argument("--workers", type=int, default=max(1, SUBMISSION_WORKERS))
+    args = parser.parse_args()
+
+    if not submission_queue.uses_mongo:
+        raise SystemExit("Standalone workers need SUBMISSION_QUEUE_BACKEND=mongo")
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    # Commits update the rollups, which must exist first
+    await ensure_rollups(db)
+    await go_runner.start()
+    submission_queue.start_workers(db, args.workers)
+    logger.info("Grading with %d workers", args.workers)
+    try:
+        await asyncio.gather(*submission_queue._workers)
+    finally:
+        go_runner.shutdown()
+        client.close()
+
+if __name__ == "__main__":
+    # Usage: python submission_queue.py [--workers N]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main())
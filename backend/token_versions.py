@@ -0,0 +1,76 @@
+# Token version store used to revoke claims-mode access tokens
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from collections import OrderedDict
+from typing import Tuple
+import os
+import time
+
+TOKEN_VERSION_CACHE_SECONDS = float(os.getenv("TOKEN_VERSION_CACHE_SECONDS", "30"))
+TOKEN_VERSION_CACHE_MAX_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_MAX_SIZE", "10000"))
+
+class TokenVersionStore:
+    """Per-user token version kept in the token_versions collection.
+
+    Claims-mode tokens embed the version they were issued with; bumping the
+    version revokes all of them. Lookups are cached per process for a few
+    seconds, so a bump made by another worker takes effect after at most
+    TOKEN_VERSION_CACHE_SECONDS. The cache is a bounded LRU, like UserCache.
+    """
+
+    def __init__(self, cache_seconds: float = TOKEN_VERSION_CACHE_SECONDS, max_size: int = TOKEN_VERSION_CACHE_MAX_SIZE):
+        self.cache_seconds = cache_seconds
+        self.max_size = max_size
+        self._cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, db: AsyncIOMotorDatabase, user_id: str) -> int:
+        cached = self._cache.get(user_id)
+        if cached:
+            if cached[0] > time.monotonic():
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return cached[1]
+            del self._cache[user_id]
+        self.misses += 1
+
+        doc = await db.token_versions.find_one({"userId": user_id}, {"_id": 0, "version": 1})
+        version = doc["version"] if doc else 0
+        self._set(user_id, version)
+        return version
+
+    async def bump(self, db: AsyncIOMotorDatabase, user_id: str) -> int:
+        doc = await db.token_versions.find_one_and_update(
+            {"userId": user_id},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._set(user_id, doc["version"])
+        return doc["version"]
+
+    def _set(self, user_id: str, version: int):
+        if self.max_size <= 0:
+            return
+        self._cache[user_id] = (time.monotonic() + self.cache_seconds, version)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.cache_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Shared by every AuthService instance in this process
+token_versions = TokenVersionStore()
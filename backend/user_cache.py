@@ -0,0 +1,84 @@
+# In-process cache of authenticated users
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from models import User
+import os
+import time
+
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+class UserCache:
+    """Bounded TTL/LRU cache of users keyed by token subject (email).
+
+    The cache is per process: writes made by another worker only become
+    visible here once the entry expires, so keep the TTL short.
+    """
+
+    def __init__(self, max_size: int = USER_CACHE_MAX_SIZE, ttl_seconds: float = USER_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._subjects_by_user_id: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            self._remove(subject)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    def set(self, subject: str, user: User):
+        if self.max_size <= 0:
+            return
+        self._remove(subject)
+        self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+        self._subjects_by_user_id[user.id] = subject
+
+        while len(self._entries) > self.max_size:
+            oldest_subject = next(iter(self._entries))
+            self._remove(oldest_subject)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str):
+        subject = self._subjects_by_user_id.get(user_id)
+        if subject is not None:
+            self._remove(subject)
+
+    def clear(self):
+        self._entries.clear()
+        self._subjects_by_user_id.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _remove(self, subject: str):
+        entry = self._entries.pop(subject, None)
+        if entry is not None:
+            user_id = entry[1].id
+            if self._subjects_by_user_id.get(user_id) == subject:
+                del self._subjects_by_user_id[user_id]
+
+# Shared by every AuthService/DatabaseService instance in this process
+user_cache = UserCache()
@@ -64,6 +64,11 @@ class ApiService {
     return this.client.get(`/courses/${courseId}`);
   }
 
+  // Lesson headers only; load full lessons with getLesson()
+  async getCourseOutline(courseId) {
+    return this.client.get(`/courses/${courseId}/outline`);
+  }
+
   async createCourse(courseData) {
     return this.client.post('/courses', courseData);
   }
@@ -81,8 +86,25 @@ class ApiService {
     return this.client.get(`/lessons/${lessonId}`);
   }
 
-  async submitCode(lessonId, code) {
-    return this.client.post(`/lessons/${lessonId}/submit`, { lessonId, code });
+  // Queues the submission; returns a job to poll with getSubmission()
+  async submitCode(lessonId, code, idempotencyKey) {
+    const headers = idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {};
+    return this.client.post(`/lessons/${lessonId}/submit`, { lessonId, code }, { headers });
+  }
+
+  // Submission endpoints
+  async getSubmission(jobId) {
+    return this.client.get(`/submissions/${jobId}`);
+  }
+
+  async waitForSubmission(jobId, intervalMs = 1000) {
+    for (;;) {
+      const response = await this.getSubmission(jobId);
+      if (response.data.status === 'completed' || response.data.status === 'failed') {
+        return response;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
   }
 
   async createLesson(lessonData) {
@@ -118,6 +140,11 @@ class ApiService {
     return this.client.put(`/progress/${progressId}`, progressData);
   }
 
+  // Offline sync: [{ lessonId, status, score, timeSpent }], results per event
+  async syncProgress(events) {
+    return this.client.post('/progress/batch', { events });
+  }
+
   // Classroom endpoints
   async getMyClassrooms() {
     return this.client.get('/classrooms');
@@ -147,8 +174,21 @@ class ApiService {
     return this.client.delete(`/classrooms/${classroomId}/leave`);
   }
 
-  async getClassroomStudents(classroomId) {
-    return this.client.get(`/classrooms/${classroomId}/students`);
+  // Teacher roster import: emails array, or a CSV File with an "email" column
+  async importRoster(classroomId, emailsOrFile) {
+    if (Array.isArray(emailsOrFile)) {
+      return this.client.post(`/classrooms/${classroomId}/roster`, { emails: emailsOrFile });
+    }
+    const form = new FormData();
+    form.append('file', emailsOrFile);
+    return this.client.post(`/classrooms/${classroomId}/roster/csv`, form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  }
+
+  // Paged in roster order; the X-Total-Count header holds the roster size
+  async getClassroomStudents(classroomId, { skip = 0, limit } = {}) {
+    return this.client.get(`/classrooms/${classroomId}/students`, { params: { skip, limit } });
   }
 
   async getClassroomProgress(classroomId) {
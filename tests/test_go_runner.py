@@ -0,0 +1,133 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import go_runner
+from go_runner import GoRunner, ProcessResult, run_process, _run_error
+from models import CodingChallenge, TestCase
+
+needs_sandbox = pytest.mark.skipif(
+    not os.path.exists(go_runner.GO_BINARY) or os.geteuid() != 0
+    or not shutil.which("prlimit") or not shutil.which("unshare"),
+    reason="needs the Go toolchain, util-linux and root"
+)
+
+async def _started_runner(**kwargs) -> GoRunner:
+    runner = GoRunner(workers=1, workdir=Path(tempfile.mkdtemp()), **kwargs)
+    await runner.start()
+    return runner
+
+def test_cancel_while_spawning_kills_the_process_group():
+    # The child's child keeps the pipes open; if only the direct child is
+    # killed the cancelled run never finishes
+    async def scenario():
+        for ticks in range(1, 12):
+            task = asyncio.create_task(run_process(["/bin/sh", "-c", "sleep 30 & wait"], timeout=60))
+            for _ in range(ticks):
+                await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.wait_for(asyncio.gather(task, return_exceptions=True), timeout=5)
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("stderr", [
+    "fatal error: out of memory allocating heap arena metadata\n\nruntime stack:\n",
+    "runtime: out of memory: cannot allocate 4294967296-byte block (3833856 in use)\nfatal error: out of memory\n"
+])
+def test_out_of_memory_is_reported_as_memory_limit(stderr):
+    run = ProcessResult(returncode=2, stdout="", stderr=stderr, timed_out=False, output_exceeded=False, elapsed=0.1)
+    assert _run_error(run) == "Memory limit exceeded"
+
+@needs_sandbox
+def test_memory_limit_exceeded():
+    # Touches every page, so the limit is hit while the heap grows rather
+    # than on one huge allocation
+    source = """package main
+
+import "fmt"
+
+func main() {
+\tvar keep [][]byte
+\tfor i := 0; i < 64; i++ {
+\t\tb := make([]byte, 64<<20)
+\t\tfor j := range b {
+\t\t\tb[j] = 1
+\t\t}
+\t\tkeep = append(keep, b)
+\t}
+\tfmt.Println(len(keep))
+}
+"""
+    challenge = CodingChallenge(template="", solution="", testCases=[TestCase(input="", expectedOutput="64")])
+
+    async def scenario():
+        runner = await _started_runner(run_concurrency=1)
+        try:
+            return await runner.grade(challenge, source)
+        finally:
+            runner.shutdown()
+
+    result = asyncio.run(scenario())
+    assert not result.testsPass
+    assert result.error == "Memory limit exceeded"
+
+@needs_sandbox
+def test_fail_fast_cancellation_leaves_no_sandboxed_process():
+    source = """package main
+
+import (
+\t"fmt"
+\t"time"
+)
+
+func main() {
+\tvar n int
+\tfmt.Scan(&n)
+\tif n > 0 {
+\t\ttime.Sleep(1500 * time.Millisecond)
+\t}
+\tfmt.Println(n)
+}
+"""
+    challenge = CodingChallenge(
+        template="", solution="",
+        testCases=[TestCase(input=str(i), expectedOutput="-1" if i == 0 else str(i)) for i in range(8)]
+    )
+
+    async def scenario():
+        runner = await _started_runner(run_concurrency=8, fail_fast=True)
+        try:
+            for attempt in range(3):
+                result = await asyncio.wait_for(runner.grade(challenge, source + "\n" * attempt), timeout=20)
+                assert result.testResults[0].error is None and not result.testsPass
+            assert runner._pool.qsize() == runner.workers
+        finally:
+            runner.shutdown()
+
+    asyncio.run(scenario())
+    sandbox_uids = range(go_runner.GRADER_SANDBOX_UID, go_runner.GRADER_SANDBOX_UID + 8)
+    assert [pid for pid in _live_pids() if _uid_of(pid) in sandbox_uids] == []
+
+def _live_pids():
+    # Killed sandbox processes are re-parented to the host's init, which may
+    # reap them later; zombies are not left running
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                if stat.read().rsplit(")", 1)[1].split()[0] != "Z":
+                    yield pid
+        except FileNotFoundError:
+            pass
+
+def _uid_of(pid: str):
+    try:
+        return os.stat(f"/proc/{pid}").st_uid
+    except FileNotFoundError:
+        return None